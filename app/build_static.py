@@ -0,0 +1,111 @@
+"""
+Build fingerprinted, precompressed static assets.
+
+Copies static/ to settings.static_build_dir with every CSS/JS/icon file
+renamed to include a content hash (css/style.3f2a9c1b0e.css). References
+in index.html, manifest.json and sw.js are rewritten to match. The service
+worker's CACHE name is derived from the build hash, so it changes exactly
+when an asset does and never needs a hand bump. Text files also get .gz
+and (if the brotli package is installed) .br siblings, which
+app.staticfiles serves directly.
+
+    python -m app.build_static
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+
+from .config import settings
+from .lazy import available
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = "static"
+
+# Files with stable URLs: they are entry points and must be revalidated
+ENTRY_POINTS = {"index.html", "sw.js", "manifest.json"}
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".svg"}
+_MIN_COMPRESS_BYTES = 512
+
+
+def _fingerprint(rel: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    root, ext = os.path.splitext(rel)
+    return f"{root}.{digest}{ext}"
+
+
+def _rewrite(text: str, mapping: dict) -> str:
+    """Replace quoted absolute references to original asset paths."""
+    for rel, hashed in mapping.items():
+        text = re.sub(rf"(?<=[\"'(])/{re.escape(rel)}(?=[\"')?#])", f"/{hashed}", text)
+    return text
+
+
+def _compress(path: str, data: bytes) -> None:
+    if os.path.splitext(path)[1] not in COMPRESSIBLE or len(data) < _MIN_COMPRESS_BYTES:
+        return
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        with open(path + ".gz", "wb") as f:
+            f.write(gz)
+    if available("brotli"):
+        import brotli
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            with open(path + ".br", "wb") as f:
+                f.write(br)
+
+
+def build(source: str = SOURCE_DIR, out: str = None) -> dict:
+    """Build the asset tree. Returns {original path: fingerprinted path}."""
+    out = out or settings.static_build_dir
+    files = {}
+    for root, _, names in os.walk(source):
+        for name in names:
+            full = os.path.join(root, name)
+            rel = os.path.relpath(full, source).replace(os.sep, "/")
+            with open(full, "rb") as f:
+                files[rel] = f.read()
+
+    mapping = {rel: _fingerprint(rel, data) for rel, data in files.items() if rel not in ENTRY_POINTS}
+    build_hash = hashlib.sha256("".join(sorted(mapping.values())).encode()).hexdigest()[:10]
+
+    for rel in ENTRY_POINTS & files.keys():
+        text = _rewrite(files[rel].decode("utf-8"), mapping)
+        if rel == "sw.js":
+            text = re.sub(r"const CACHE = '[^']*';", f"const CACHE = 'kitchenventory-{build_hash}';", text)
+        files[rel] = text.encode("utf-8")
+
+    # Write to a temp dir and swap, so a running server never sees a half-built tree
+    tmp = out.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    for rel, data in files.items():
+        dest = os.path.join(tmp, mapping.get(rel, rel))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, "wb") as f:
+            f.write(data)
+        _compress(dest, data)
+    with open(os.path.join(tmp, "asset-manifest.json"), "w") as f:
+        json.dump({"build": build_hash, "assets": mapping}, f, indent=2)
+
+    old = out.rstrip("/") + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(out):
+        os.rename(out, old)
+    os.rename(tmp, out)
+    shutil.rmtree(old, ignore_errors=True)
+
+    logger.info("Built %d assets into %s (build %s)", len(files), out, build_hash)
+    return mapping
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build()
+    if not available("brotli"):
+        print("brotli not installed: wrote .gz variants only (pip install brotli)", file=sys.stderr)
@@ -0,0 +1,152 @@
+"""
+gzip / brotli compression of responses.
+
+A response is compressed when the client accepts an encoding, the content
+type is text-like (JSON, NDJSON, HTML, CSV, JS, SVG) and the body reaches
+COMPRESS_MIN_BYTES. Below about a kilobyte the CPU cost and header overhead
+outweigh the saving. brotli is used when the client accepts br and the
+package is installed (app/lazy.py), otherwise gzip.
+
+Dynamic bodies use fast settings (gzip 6, brotli 4). The prebuilt static
+assets are compressed at maximum level by app.build_static. They already
+carry Content-Encoding, so they pass through untouched, like every other
+pre-encoded body. Event streams (the job progress SSE) pass through as
+well, since every event must reach the client as soon as it is written,
+and so do 206 partial responses, whose byte ranges refer to the file as
+stored. Other streamed bodies, such as the CSV and NDJSON exports, are
+compressed chunk by chunk with a flush after each chunk.
+"""
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+from .lazy import available, require
+
+_COMPRESSIBLE = {"application/json", "application/x-ndjson", "application/javascript", "application/xml"}
+_COMPRESSIBLE_SUFFIXES = ("+json", "+xml", "ndjson")  # image/svg+xml, application/problem+json, ...
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """The codings we can send ('br', 'gzip') that an Accept-Encoding header allows, best first.
+
+    q=0 excludes a coding, and "*" stands for any coding not listed.
+    """
+    accepted, refused = set(), set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        coding, q = coding.strip(), params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    refused.add(coding)
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return [
+        coding for coding in ("br", "gzip")
+        if coding not in refused and (coding in accepted or "*" in accepted)
+    ]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' for a dynamic response, or None. br needs the brotli package."""
+    for coding in accepted_encodings(accept_encoding):
+        if coding == "gzip" or available("brotli"):
+            return coding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = require("brotli").Compressor(quality=settings.compress_brotli_quality)
+        else:
+            self._gz = zlib.compressobj(settings.compress_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress data and flush, so the client can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+
+def _compressible(status: int, headers: Headers) -> bool:
+    if status == 206 or "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE or media_type.endswith(_COMPRESSIBLE_SUFFIXES)
+
+
+class CompressionMiddleware:
+    """Compress text-like responses at or above COMPRESS_MIN_BYTES."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compress_enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            compressor = state["compressor"]
+            if compressor is not None:
+                data = compressor.chunk(body) if more_body else compressor.finish(body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            start = state["start"]
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            start["headers"] = headers.raw
+            compressible = _compressible(start["status"], headers)
+            if not compressible or (not more_body and len(body) < settings.compress_min_bytes):
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                state["passthrough"] = True
+                await send(start)
+                await send(message)
+                return
+
+            compressor = state["compressor"] = _Compressor(encoding)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                data = compressor.chunk(body)
+            else:
+                data = compressor.finish(body)
+                headers["Content-Length"] = str(len(data))
+            await send(start)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -4,6 +4,89 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/kitchenventory.db"
     anthropic_api_key: str = ""
+    static_build_dir: str = "build/static"  # output of `python -m app.build_static`
+    use_static_build: bool = True  # run.py dev mode turns this off to serve static/ live
+    image_cache_dir: str = "data/image_cache"
+    image_cache_max_mb: int = 200
+
+    # AI / scrape concurrency: max calls in flight per feature, plus a bounded wait queue
+    recipe_suggest_concurrency: int = 2
+    parse_list_concurrency: int = 2
+    parse_url_concurrency: int = 4
+    ai_queue_size: int = 8
+    ai_queue_timeout_seconds: float = 20.0
+
+    # Background jobs (app/jobqueue.py)
+    job_workers: int = 2
+    job_timeout_seconds: float = 120.0
+    job_max_attempts: int = 3
+    job_retention_hours: int = 24
+
+    # Delta sync (/api/sync): deleted-row tombstones older than this are compacted away
+    sync_tombstone_retention_days: int = 30
+    sync_compact_interval_hours: float = 6.0
+
+    # Multi-household hosting (app/tenancy.py): one SQLite file per household
+    households_enabled: bool = False
+    household_data_dir: str = "data/households"
+    household_max_open: int = 64  # engines kept open, least recently used closed first
+    household_idle_seconds: int = 600
+    # Shared secret the reverse proxy sends as X-Household-Proxy-Token; without it
+    # X-Household / the household cookie are refused (nobody can pick a household)
+    household_proxy_token: str = ""
+
+    # Expiration / low-stock digest (app/services/digest_service.py)
+    digest_interval_minutes: int = 60
+    digest_expiring_days: int = 7
+    digest_sinks: str = "log"  # comma-separated: log, file, webhook
+    digest_file_path: str = "data/digests.ndjson"
+    digest_webhook_url: str = ""
+
+    # Autocomplete prefix index, per household (app/services/autocomplete_service.py)
+    autocomplete_max_terms: int = 20000
+
+    # Change history (app/history.py): compacted to daily rows, then dropped
+    history_compact_after_days: int = 30
+    history_retention_days: int = 365
+
+    # Online backups (app/backup.py)
+    backups_enabled: bool = True
+    backup_dir: str = "data/backups"
+    backup_interval_hours: float = 24.0
+    backup_keep: int = 14
+    backup_pages_per_step: int = 256  # 1 MB at SQLite's default 4 KB page size
+    backup_step_sleep_ms: float = 5.0
+    backup_max_restarts: int = 5
+
+    # SQL query counting per request (app/querystats.py)
+    query_stats_enabled: bool = True
+    query_repeat_threshold: int = 5  # same statement this often in one request = likely N+1
+
+    # Response compression (app/compression.py); brotli when installed, else gzip
+    compress_enabled: bool = True
+    compress_min_bytes: int = 1024  # smaller bodies go out as is
+    compress_gzip_level: int = 6
+    compress_brotli_quality: int = 4  # static assets are prebuilt at 11 by app.build_static
+
+    # Per-request profiling (app/profiling.py); off unless a token or rate is set
+    profile_token: str = ""  # requests with X-Profile: <token> are profiled
+    profile_sample_rate: float = 0.0  # fraction of all requests to profile
+    profile_interval_ms: float = 2.0
+    profile_dir: str = "data/profiles"
+    profile_keep: int = 200
+
+    # Server (run.py). In --prod mode the DB is prepared once by run.py and
+    # workers start with INIT_DB_ON_STARTUP=false.
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 2
+    server_keepalive_seconds: int = 20
+    server_backlog: int = 2048
+    server_graceful_timeout_seconds: int = 20
+    server_max_requests: int = 0  # recycle a worker after this many requests; 0 = never
+    init_db_on_startup: bool = True
+    # Only the worker holding this lock runs scheduled tasks (app/scheduler.py)
+    scheduler_lock_path: str = "data/scheduler.lock"
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
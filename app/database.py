@@ -1,17 +1,117 @@
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+
+from . import scheduler, tenancy
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def make_engine(url: str) -> Engine:
+    eng = create_engine(url, connect_args={"check_same_thread": False})
+    if url.startswith("sqlite"):
+        @event.listens_for(eng, "connect")
+        def _sqlite_pragmas(dbapi_conn, _):
+            # WAL lets readers proceed while one worker writes; busy_timeout makes
+            # concurrent writers from other processes wait instead of failing.
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA busy_timeout=5000")
+            cur.close()
+    return eng
+
+
+# The default household's database. It also holds process-wide tables (jobs).
+engine = make_engine(settings.database_url)
+
+# Open engines for other households, least recently used first: household -> [engine, last_used]
+_engines: "OrderedDict[str, list]" = OrderedDict()
+_engines_lock = threading.Lock()
+_opening: dict = {}  # household -> lock held while its DB is first migrated
+_prepared: set = set()
+
+
+def engine_for(household: str) -> Engine:
+    """Engine for a provisioned household's database, migrating it on first use in this process.
+
+    Raises tenancy.UnknownHousehold if the household has no database; they
+    are created with `python -m app.migrate --household <slug> --create`.
+    """
+    if household == tenancy.DEFAULT_HOUSEHOLD:
+        return engine
+    with _engines_lock:
+        entry = _engines.get(household)
+        if entry:
+            entry[1] = time.monotonic()
+            _engines.move_to_end(household)
+            return entry[0]
+        opening = _opening.setdefault(household, threading.Lock())
+
+    # Only requests for this household wait on its first-time setup
+    with opening:
+        with _engines_lock:
+            entry = _engines.get(household)
+            if entry:
+                return entry[0]
+        if not tenancy.provisioned(household):
+            with _engines_lock:
+                _opening.pop(household, None)
+            raise tenancy.UnknownHousehold(household)
+        eng = make_engine(tenancy.database_url(household))
+        if household not in _prepared:
+            from .startup import prepare_database
+            prepare_database(eng)
+            _prepared.add(household)
+
+        with _engines_lock:
+            _engines[household] = [eng, time.monotonic()]
+            _opening.pop(household, None)
+            evicted = []
+            while len(_engines) > settings.household_max_open:
+                evicted.append(_engines.popitem(last=False))
+    for name, (old, _) in evicted:
+        logger.info("Closing household database %s (LRU)", name)
+        old.dispose()
+    return eng
+
+
+@scheduler.every(60, leader_only=False)
+def close_idle_engines() -> None:
+    """Dispose engines for households that have gone quiet."""
+    cutoff = time.monotonic() - settings.household_idle_seconds
+    with _engines_lock:
+        idle = [name for name, (_, last_used) in _engines.items() if last_used < cutoff]
+        closed = [(name, _engines.pop(name)[0]) for name in idle]
+    for name, eng in closed:
+        logger.info("Closing idle household database %s", name)
+        eng.dispose()
+
+
+def open_households() -> list:
+    with _engines_lock:
+        return list(_engines)
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+# Sessions on the default database regardless of the current household
+ControlSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def SessionLocal() -> Session:
+    """A session on the current household's database."""
+    return _session_factory(bind=engine_for(tenancy.current()))
 
 
 class Base(DeclarativeBase):
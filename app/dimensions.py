@@ -0,0 +1,215 @@
+"""
+Process-local cache of the small dimension tables.
+
+Categories, locations, recipe tags and app settings are a few dozen rows
+that almost never change. Each household keeps one immutable snapshot of
+all four. Item responses are hydrated from it (hydrate()) instead of
+joining categories and locations into every item query.
+
+Triggers on the four tables bump cache_versions.version for 'dimensions'
+(migration 12). At most once every CHECK_SECONDS a reader compares that
+version with its snapshot's and reloads on a mismatch, so writes from
+other workers show up within a second. Writes in this process call
+invalidate(), so the next read here checks right away.
+
+    python -m app.dimensions --bench [--rows N]   # item list: joins vs cache
+"""
+import argparse
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from . import tenancy
+from .config import settings
+from .models import AppSetting, Category, Location, RecipeTag
+
+CHECK_SECONDS = 1.0
+VERSION_KEY = "dimensions"
+TABLES = ("categories", "locations", "recipe_tags", "app_settings")
+
+
+class Dimension(NamedTuple):
+    id: int
+    name: str
+    sort_order: int
+
+
+class Tag(NamedTuple):
+    id: int
+    name: str
+    slug: str
+    sort_order: int
+
+
+class Snapshot(NamedTuple):
+    version: int
+    categories: Dict[int, Dimension]  # in display order
+    locations: Dict[int, Dimension]
+    tags: List[Tag]
+    settings: Dict[str, str]
+
+
+class _Entry:
+    __slots__ = ("snapshot", "checked_at", "lock")
+
+    def __init__(self):
+        self.snapshot: Optional[Snapshot] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+_entries: "OrderedDict[str, _Entry]" = OrderedDict()
+_entries_lock = threading.Lock()
+
+
+def _entry_for(household: str) -> _Entry:
+    with _entries_lock:
+        entry = _entries.get(household)
+        if entry is None:
+            entry = _entries[household] = _Entry()
+            while len(_entries) > settings.household_max_open:
+                _entries.popitem(last=False)
+        _entries.move_to_end(household)
+        return entry
+
+
+def install_triggers(conn) -> None:
+    conn.execute(text("INSERT OR IGNORE INTO cache_versions (name, version) VALUES (:name, 0)"), {"name": VERSION_KEY})
+    for table in TABLES:
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            name = f"{table}_cache_{op.lower()}"
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(text(f"""
+                CREATE TRIGGER {name} AFTER {op} ON {table}
+                BEGIN
+                    UPDATE cache_versions SET version = version + 1 WHERE name = '{VERSION_KEY}';
+                END
+            """))
+
+
+def _version(db: Session) -> int:
+    return db.execute(
+        text("SELECT version FROM cache_versions WHERE name = :name"), {"name": VERSION_KEY}
+    ).scalar() or 0
+
+
+def _load(db: Session, version: int) -> Snapshot:
+    def dims(model):
+        rows = db.query(model.id, model.name, model.sort_order).order_by(model.sort_order, model.name)
+        return {row.id: Dimension(*row) for row in rows}
+
+    tags = [Tag(*row) for row in db.query(RecipeTag.id, RecipeTag.name, RecipeTag.slug, RecipeTag.sort_order)
+            .order_by(RecipeTag.sort_order)]
+    return Snapshot(
+        version=version,
+        categories=dims(Category),
+        locations=dims(Location),
+        tags=tags,
+        settings=dict(db.query(AppSetting.key, AppSetting.value).all()),
+    )
+
+
+def get(db: Session) -> Snapshot:
+    """The current household's snapshot, reloaded if another writer changed a dimension."""
+    entry = _entry_for(tenancy.current())
+    snapshot = entry.snapshot
+    if snapshot is not None and time.monotonic() - entry.checked_at < CHECK_SECONDS:
+        return snapshot
+    with entry.lock:
+        if entry.snapshot is not None and time.monotonic() - entry.checked_at < CHECK_SECONDS:
+            return entry.snapshot
+        version = _version(db)
+        # != rather than >: a restored backup can move the version backwards
+        if entry.snapshot is None or entry.snapshot.version != version:
+            entry.snapshot = _load(db, version)
+        entry.checked_at = time.monotonic()
+        return entry.snapshot
+
+
+def invalidate() -> None:
+    """Make the next read in this process re-check the version. Call after committing a write."""
+    _entry_for(tenancy.current()).checked_at = 0.0
+
+
+def hydrate(db: Session, items):
+    """Fill Item.category / Item.location from the cache; returns items.
+
+    Call it last, after the handler's final commit: the cached values are
+    plain tuples and must never be flushed.
+    """
+    snapshot = get(db)
+    for item in items:
+        set_committed_value(item, "category", snapshot.categories.get(item.category_id))
+        set_committed_value(item, "location", snapshot.locations.get(item.location_id))
+    return items
+
+
+def stats() -> dict:
+    with _entries_lock:
+        return {
+            household: {"version": e.snapshot.version, "age_seconds": round(time.monotonic() - e.checked_at, 1)}
+            for household, e in _entries.items() if e.snapshot is not None
+        }
+
+
+def bench(rows: int, runs: int = 15) -> None:
+    """Median item-list latency (query + serialization) with SQL joins vs cache hydration."""
+    import tempfile
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import joinedload, sessionmaker
+
+    from .migrate import migrate
+    from .models import Item
+    from .schemas import ItemOut
+    from .seed import seed_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        migrate(engine)
+        seed_data(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Item), [
+                {"name": f"Item {i}", "normalized_name": f"item {i}", "quantity": i % 7, "unit": "g",
+                 "low_threshold": 1, "category_id": i % 10 + 1, "location_id": i % 4 + 1}
+                for i in range(rows)
+            ])
+        make_session = sessionmaker(bind=engine)
+
+        def joined(db):
+            return db.query(Item).options(joinedload(Item.category), joinedload(Item.location)).order_by(Item.name).all()
+
+        def cached(db):
+            return hydrate(db, db.query(Item).order_by(Item.name).all())
+
+        for label, fn in (("SQL joins", joined), ("cache hydration", cached)):
+            load, total = [], []
+            for _ in range(runs):
+                db = make_session()
+                started = time.perf_counter()
+                items = fn(db)
+                loaded = time.perf_counter()
+                [ItemOut.model_validate(i) for i in items]
+                load.append((loaded - started) * 1000)
+                total.append((time.perf_counter() - started) * 1000)
+                db.close()
+            print(f"{label:16} {rows} items: load {statistics.median(load):.1f} ms, "
+                  f"load + serialize {statistics.median(total):.1f} ms (medians of {runs})")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dimension cache tools")
+    parser.add_argument("--bench", action="store_true", help="time item listing with joins vs the cache")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.rows)
+    else:
+        parser.print_help()
@@ -0,0 +1,106 @@
+"""
+Sparse fieldsets for list endpoints: ?fields=id,name,quantity
+
+A FieldSet maps the field names of a response schema to the columns that
+produce them. When a request names fields, the endpoint keeps its filters
+and ordering but swaps the selected entities for just those columns
+(Query.with_entities). Unrequested columns are never read, no ORM objects
+are built, and the response is plain dicts instead of validated Out models.
+id is always included. Unknown names are rejected with a ValueError.
+
+Fields that aren't columns name the columns they are computed from, e.g.
+ItemOut.category needs category_id (filled from the dimension cache) and
+is_low needs quantity and low_threshold. Computed fields reuse the schema's
+own property, so both paths agree.
+"""
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def json_list(value) -> list:
+    """Decode a JSON-array text column, as the Out schemas' validators do."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or []
+
+
+class FieldSet:
+    def __init__(
+        self,
+        model,
+        schema,
+        derived: Optional[Dict[str, Tuple[Sequence[str], Callable]]] = None,
+        decoders: Optional[Dict[str, Callable]] = None,
+    ):
+        """derived: name -> (columns it needs, fn(row, context) -> value).
+
+        Computed fields of schema need an entry in derived only for their
+        columns; pass (columns, None) to evaluate the schema's property.
+        """
+        self.model = model
+        self.decoders = decoders or {}
+        columns = set(model.__table__.columns.keys())
+        computed = schema.model_computed_fields
+        self._specs: Dict[str, Tuple[Sequence[str], Optional[Callable]]] = {}
+        for name in list(schema.model_fields) + list(computed):
+            if derived and name in derived:
+                deps, fn = derived[name]
+                if fn is None:
+                    fn = _property(computed[name].wrapped_property)
+                self._specs[name] = (deps, fn)
+            elif name in columns:
+                self._specs[name] = ((name,), None)
+        self.names = list(self._specs)
+
+    def parse(self, fields: Optional[str]) -> Optional[List[str]]:
+        """Requested names in order, id first; None when fields is empty (full response)."""
+        if not fields or not fields.strip():
+            return None
+        names = ["id"]
+        for name in (n.strip() for n in fields.split(",")):
+            if name and name not in names:
+                names.append(name)
+        unknown = [n for n in names if n not in self._specs]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.names)}")
+        return names
+
+    def columns(self, names: Iterable[str], extra: Iterable[str] = ()) -> list:
+        needed = []
+        for name in list(names):
+            for column in self._specs[name][0]:
+                if column not in needed:
+                    needed.append(column)
+        needed.extend(c for c in extra if c not in needed)
+        return [getattr(self.model, c) for c in needed]
+
+    def select(self, query, names: Iterable[str], extra: Iterable[str] = ()):
+        """query (filtered and ordered as usual) reduced to the columns names need, plus extra."""
+        return query.with_entities(*self.columns(names, extra))
+
+    def rows(self, rows, names: List[str], context=None) -> List[dict]:
+        out = []
+        for row in rows:
+            record = {}
+            for name in names:
+                deps, fn = self._specs[name]
+                if fn is not None:
+                    record[name] = fn(row, context)
+                else:
+                    value = getattr(row, name)
+                    decode = self.decoders.get(name)
+                    record[name] = decode(value) if decode else value
+            out.append(record)
+        return out
+
+    def response(self, rows, names: List[str], context=None) -> JSONResponse:
+        """Serialized rows. Returned as a Response, so FastAPI skips the route's response_model."""
+        return JSONResponse(jsonable_encoder(self.rows(rows, names, context)))
+
+
+def _property(prop: property) -> Callable:
+    # Schema properties only read attributes, which result rows provide
+    return lambda row, context: prop.fget(row)
@@ -0,0 +1,187 @@
+"""
+Append-only change history for items, shopping rows and meal plan entries.
+
+A Session after_flush hook diffs every flushed object of a tracked model.
+It appends one row per object with only the changed fields, as
+{field: [old, new]}, in the same transaction as the change. A rolled-back
+mutation therefore leaves no history. Creates record the new values and
+deletes record the old ones. Derived and bookkeeping columns are skipped.
+
+Bulk statements (CSV import, clear checked) bypass the ORM and are not
+recorded, except where they call append() themselves (meal plan upserts).
+
+A daily scheduled task keeps the table bounded. Entries older than
+HISTORY_COMPACT_AFTER_DAYS are collapsed into one "day" row per entity per
+day, holding the first old and the last new value of each field. Entries
+older than HISTORY_RETENTION_DAYS are dropped.
+"""
+import json
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event, func, inspect, insert
+from sqlalchemy.orm import Session
+
+from . import scheduler, tenancy
+from .config import settings
+from .database import SessionLocal
+from .models import ChangeHistory, Item, ShoppingListItem, MealPlanEntry
+
+logger = logging.getLogger(__name__)
+
+TRACKED = {Item: "item", ShoppingListItem: "shopping", MealPlanEntry: "meal_plan"}
+ENTITIES = tuple(TRACKED.values())
+_SKIP = {"id", "created_at", "updated_at", "change_seq", "normalized_name", "base_quantity", "base_unit"}
+_ACTOR_HEADER = "x-actor"
+
+_actor: ContextVar[str] = ContextVar("history_actor", default="")
+
+
+def _value(v):
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+
+def _fields(obj):
+    return [attr.key for attr in inspect(obj).mapper.column_attrs if attr.key not in _SKIP]
+
+
+def _diff(obj) -> dict:
+    state = inspect(obj)
+    changes = {}
+    for key in _fields(obj):
+        hist = state.attrs[key].history
+        if not hist.has_changes():
+            continue
+        old = hist.deleted[0] if hist.deleted else None
+        new = hist.added[0] if hist.added else None
+        if old != new:
+            changes[key] = [_value(old), _value(new)]
+    return changes
+
+
+@event.listens_for(Session, "after_flush")
+def _record(session: Session, flush_context) -> None:
+    rows = []
+    for obj in session.new:
+        entity = TRACKED.get(type(obj))
+        if entity:
+            values = {k: [None, _value(getattr(obj, k))] for k in _fields(obj) if getattr(obj, k) is not None}
+            rows.append((entity, obj.id, "create", values))
+    for obj in session.dirty:
+        entity = TRACKED.get(type(obj))
+        if entity and session.is_modified(obj, include_collections=False):
+            changes = _diff(obj)
+            if changes:
+                rows.append((entity, obj.id, "update", changes))
+    for obj in session.deleted:
+        entity = TRACKED.get(type(obj))
+        if entity:
+            values = {k: [_value(getattr(obj, k)), None] for k in _fields(obj) if getattr(obj, k) is not None}
+            rows.append((entity, obj.id, "delete", values))
+
+    if rows:
+        append(session.connection(), rows)
+
+
+def append(connection, rows) -> None:
+    """Insert (entity, entity_id, op, {field: [old, new]}) rows, e.g. for a bulk statement."""
+    actor = _actor.get()
+    connection.execute(insert(ChangeHistory), [
+        {
+            "entity": entity,
+            "entity_id": entity_id,
+            "op": op,
+            "changes": json.dumps(changes, separators=(",", ":")),
+            "actor": actor,
+        }
+        for entity, entity_id, op, changes in rows
+    ])
+
+
+class ActorMiddleware:
+    """Bind the optional X-Actor request header (device or person name) for history rows."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        raw = dict(scope["headers"]).get(_ACTOR_HEADER.encode(), b"")
+        token = _actor.set(raw.decode("utf-8", "replace")[:100])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _actor.reset(token)
+
+
+def _merge(entries) -> tuple:
+    """Collapse one entity's entries (oldest first) into a single (op, changes)."""
+    merged = OrderedDict()
+    for entry in entries:
+        for field, (old, new) in json.loads(entry.changes).items():
+            if field in merged:
+                merged[field][1] = new
+            else:
+                merged[field] = [old, new]
+    ops = [e.op for e in entries]
+    if "delete" in ops:
+        # The delete row already holds the final values before removal
+        return "delete", json.loads(entries[ops.index("delete")].changes)
+    if ops[0] == "create":
+        return "create", dict(merged)
+    return "day", {k: v for k, v in merged.items() if v[0] != v[1]}
+
+
+def compact(db: Session) -> int:
+    """Collapse old entries into daily rows and drop expired ones. Returns rows removed."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    removed = db.query(ChangeHistory).filter(
+        ChangeHistory.created_at < now - timedelta(days=settings.history_retention_days)
+    ).delete(synchronize_session=False)
+
+    cutoff = now - timedelta(days=settings.history_compact_after_days)
+    day = func.date(ChangeHistory.created_at)
+    groups = (
+        db.query(ChangeHistory.entity, ChangeHistory.entity_id, day)
+        .filter(ChangeHistory.created_at < cutoff, ChangeHistory.op != "day")
+        .group_by(ChangeHistory.entity, ChangeHistory.entity_id, day)
+        .having(func.count(ChangeHistory.id) > 1)
+        .all()
+    )
+    for entity, entity_id, day_value in groups:
+        entries = (
+            db.query(ChangeHistory)
+            .filter(ChangeHistory.entity == entity, ChangeHistory.entity_id == entity_id, day == day_value)
+            .order_by(ChangeHistory.id)
+            .all()
+        )
+        op, changes = _merge(entries)
+        last = entries[-1]
+        # Keep the last row's id and time so keyset pagination order is unchanged
+        last.op = op
+        last.changes = json.dumps(changes, separators=(",", ":"))
+        last.actor = ",".join(sorted({e.actor for e in entries if e.actor}))[:100]
+        for entry in entries[:-1]:
+            db.delete(entry)
+        removed += len(entries) - 1
+    db.commit()
+    return removed
+
+
+def _compact_current_household() -> None:
+    db = SessionLocal()
+    try:
+        removed = compact(db)
+        if removed:
+            logger.info("Compacted %d history rows for household %s", removed, tenancy.current())
+    finally:
+        db.close()
+
+
+@scheduler.every(24 * 3600, run_at_start=True)
+def compact_all_households() -> None:
+    tenancy.for_each_household(_compact_current_household)
@@ -0,0 +1,159 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+Routers opt in with APIRouter(route_class=IdempotentRoute). When a POST,
+PUT, PATCH or DELETE carries an Idempotency-Key header, the first
+successful response is stored. Any retry with the same key gets that
+stored response back without running the handler again. The key is
+reserved (status_code PENDING) before the handler runs, so a duplicate
+that arrives while the first is still running waits for its response
+instead of applying the mutation a second time. That makes it
+safe for the service worker to replay its offline outbox after a flaky
+connection, even if the original request actually reached the server.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
+
+from .database import SessionLocal
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = "idempotency-key"
+RETENTION = timedelta(hours=48)
+PENDING = 0  # status_code of a key whose first request is still running
+PENDING_TIMEOUT = timedelta(minutes=5)  # a reservation this old was abandoned (crashed worker)
+_WAIT_SECONDS = 10.0
+_POLL_SECONDS = 0.1
+_MUTATING = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _lookup(key: str):
+    db = SessionLocal()
+    try:
+        return db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    finally:
+        db.close()
+
+
+def _reserve(key: str, method: str, path: str) -> Optional[IdempotencyKey]:
+    """Claim key for this request before it runs. Returns the existing row if the key is taken."""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            (IdempotencyKey.created_at < _now() - RETENTION)
+            | ((IdempotencyKey.status_code == PENDING) & (IdempotencyKey.created_at < _now() - PENDING_TIMEOUT))
+        ).delete(synchronize_session=False)
+        db.add(IdempotencyKey(key=key, method=method, path=path, status_code=PENDING, body=""))
+        db.commit()
+        return None
+    except IntegrityError:
+        # Primary key conflict: a concurrent or earlier request with this key got there first
+        db.rollback()
+        return db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    finally:
+        db.close()
+
+
+def _complete(key: str, response: Response) -> None:
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update({
+            "status_code": response.status_code,
+            "body": bytes(response.body or b"").decode("utf-8"),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(key: str) -> None:
+    """Drop a reservation whose request failed, so a retry runs it again."""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key, IdempotencyKey.status_code == PENDING
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _wait(key: str, row: IdempotencyKey) -> Optional[IdempotencyKey]:
+    """Poll a reserved key until its request finishes (or is released), up to _WAIT_SECONDS."""
+    waited = 0.0
+    while row is not None and row.status_code == PENDING and waited < _WAIT_SECONDS:
+        await asyncio.sleep(_POLL_SECONDS)
+        waited += _POLL_SECONDS
+        row = await run_in_threadpool(_lookup, key)
+    return row
+
+
+class IdempotentRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            key = request.headers.get(HEADER)
+            if not key or request.method not in _MUTATING:
+                return await original(request)
+
+            if len(key) > 200:
+                return JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)
+
+            # The key is reserved before the handler runs, so two concurrent
+            # requests with one key (an outbox replay racing a manual retry)
+            # can't both apply the mutation: the second waits for the first.
+            reserved = False
+            for _ in range(2):
+                stored = await run_in_threadpool(_reserve, key, request.method, request.url.path)
+                if stored is None:
+                    reserved = True
+                    break
+                if stored.method != request.method or stored.path != request.url.path:
+                    return JSONResponse(
+                        {"detail": "Idempotency-Key was already used for a different request"},
+                        status_code=422,
+                    )
+                stored = await _wait(key, stored)
+                if stored is None:
+                    continue  # the first request failed and released the key: run it here
+                if stored.status_code == PENDING:
+                    break
+                return Response(
+                    content=stored.body,
+                    status_code=stored.status_code,
+                    media_type="application/json" if stored.body else None,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+            if not reserved:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+
+            try:
+                response = await original(request)
+            except BaseException:
+                await run_in_threadpool(_release, key)
+                raise
+            if 200 <= response.status_code < 300 and hasattr(response, "body"):
+                await run_in_threadpool(_complete, key, response)
+            else:
+                await run_in_threadpool(_release, key)
+            return response
+
+        return handler
@@ -0,0 +1,61 @@
+"""
+Import-time budget check for the web app.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter
+and fails if startup imports exceed the budget, or if any heavy optional
+dependency from app.lazy.PACKAGES is imported eagerly.
+
+    python -m app.importtime                  # default budget
+    python -m app.importtime --budget-ms 400  # custom budget
+    python -m app.importtime --top 15         # show the slowest imports
+"""
+import argparse
+import subprocess
+import sys
+
+from .lazy import PACKAGES
+
+DEFAULT_BUDGET_MS = 1000
+
+
+def measure(target: str = "app.main") -> dict:
+    """Return {module: cumulative microseconds} for a cold import of target."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def check(budget_ms: int, top: int = 0) -> int:
+    times = measure()
+    total_ms = times.get("app.main", 0) / 1000
+    eager = sorted(m for m in times if m.split(".")[0] in PACKAGES and "." not in m)
+
+    print(f"import app.main: {total_ms:.0f} ms (budget {budget_ms} ms)")
+    if top:
+        for name, us in sorted(times.items(), key=lambda kv: -kv[1])[:top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: heavy optional modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check app startup import time")
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports")
+    args = parser.parse_args()
+    sys.exit(check(args.budget_ms, args.top))
@@ -0,0 +1,230 @@
+"""
+Persistent background jobs for slow AI and scrape work.
+
+Jobs are rows in the `jobs` table, so they survive restarts. A small pool
+of worker threads, started from the app lifespan, claims queued jobs with
+a conditional UPDATE. That claim is safe even when several server
+processes share one database. Failed attempts are retried with
+exponential backoff, except for ValueError, which handlers raise for
+permanent problems (bad input, missing API key). A job stuck in `running`
+longer than its timeout is assumed lost (crash, restart) and requeued.
+
+The queue lives in the default database for every household. Each job
+records the household that enqueued it, and its handler runs with that
+household selected.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from . import tenancy
+from .config import settings
+from .database import ControlSession
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TERMINAL = ("done", "failed")
+
+_POLL_SECONDS = 1.0
+_SWEEP_SECONDS = 30.0
+_BACKOFF_BASE_SECONDS = 5
+
+_handlers: Dict[str, Callable[[dict], Any]] = {}
+_wakeup = threading.Event()
+_stop = threading.Event()
+_threads: list = []
+_executor = None
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def handler(kind: str):
+    """Register the function that runs jobs of this kind. It receives the payload dict."""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def kinds() -> list:
+    return sorted(_handlers)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(db: Session, kind: str, payload: dict) -> Job:
+    """Queue a job for the current household. `db` must be a ControlSession."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        household=tenancy.current(),
+        status="queued",
+        payload=json.dumps(payload),
+        max_attempts=settings.job_max_attempts,
+        timeout_seconds=settings.job_timeout_seconds,
+        run_after=_utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def start() -> None:
+    """Start the worker threads. Called once from the app lifespan."""
+    global _executor
+    if _threads:
+        return
+    _stop.clear()
+    # Handlers run in their own executor so a worker can give up on a hung call
+    _executor = ThreadPoolExecutor(max_workers=settings.job_workers * 2, thread_name_prefix="job-run")
+    for i in range(settings.job_workers):
+        t = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+        t.start()
+        _threads.append(t)
+    logger.info("Started %d job workers", settings.job_workers)
+
+
+def stop() -> None:
+    global _executor
+    _stop.set()
+    _wakeup.set()
+    for t in _threads:
+        t.join(timeout=5)
+    _threads.clear()
+    if _executor:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _worker_loop() -> None:
+    while not _stop.is_set():
+        try:
+            _requeue_stale()
+            job_id = _claim_next()
+        except Exception:
+            logger.exception("Job worker could not poll the queue")
+            job_id = None
+
+        if job_id is None:
+            _wakeup.wait(_POLL_SECONDS)
+            _wakeup.clear()
+            continue
+        _execute(job_id)
+
+
+def _claim_next():
+    """Atomically move the oldest runnable job to `running` and return its id."""
+    db = ControlSession()
+    try:
+        now = _utcnow()
+        candidates = (
+            db.query(Job.id)
+            .filter(Job.status == "queued", Job.run_after <= now)
+            .order_by(Job.created_at)
+            .limit(5)
+            .all()
+        )
+        for (job_id,) in candidates:
+            claimed = (
+                db.query(Job)
+                .filter(Job.id == job_id, Job.status == "queued")
+                .update(
+                    {"status": "running", "started_at": now, "attempts": Job.attempts + 1},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed:
+                return job_id
+        return None
+    finally:
+        db.close()
+
+
+def _requeue_stale() -> None:
+    """Put back jobs whose worker died mid-run (process restart or crash)."""
+    global _last_sweep
+    with _sweep_lock:
+        if time.monotonic() - _last_sweep < _SWEEP_SECONDS:
+            return
+        _last_sweep = time.monotonic()
+
+    db = ControlSession()
+    try:
+        now = _utcnow()
+        stale = db.query(Job).filter(Job.status == "running").all()
+        for job in stale:
+            # grace period on top of the timeout so a live worker always finishes first
+            if job.started_at and job.started_at + timedelta(seconds=job.timeout_seconds + 30) < now:
+                logger.warning("Requeuing stale job %s (%s)", job.id, job.kind)
+                _fail_attempt(job, "Worker stopped before the job finished")
+        cutoff = now - timedelta(hours=settings.job_retention_hours)
+        db.query(Job).filter(Job.status.in_(TERMINAL), Job.finished_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _execute(job_id: str) -> None:
+    db = ControlSession()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        fn = _handlers.get(job.kind)
+        if fn is None:
+            job.status = "failed"
+            job.error = f"No handler for job kind '{job.kind}'"
+            job.finished_at = _utcnow()
+            db.commit()
+            return
+
+        future = _executor.submit(_run_handler, job.household, fn, json.loads(job.payload or "{}"))
+        try:
+            result = future.result(timeout=job.timeout_seconds)
+        except FutureTimeout:
+            _fail_attempt(job, f"Timed out after {job.timeout_seconds:.0f}s")
+        except ValueError as e:
+            # Handlers raise ValueError for problems a retry won't fix
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = _utcnow()
+        except Exception as e:
+            logger.warning("Job %s (%s) attempt %d failed: %s", job.id, job.kind, job.attempts, e)
+            _fail_attempt(job, str(e))
+        else:
+            job.status = "done"
+            job.result = json.dumps(result)
+            job.error = ""
+            job.finished_at = _utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_handler(household: str, fn, payload: dict):
+    with tenancy.use(household):
+        return fn(payload)
+
+
+def _fail_attempt(job: Job, error: str) -> None:
+    """Schedule a retry with exponential backoff, or fail the job for good."""
+    job.error = error[:1000]
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.finished_at = _utcnow()
+    else:
+        job.status = "queued"
+        job.run_after = _utcnow() + timedelta(seconds=_BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1))
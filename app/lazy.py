@@ -0,0 +1,40 @@
+"""
+Deferred imports for heavy, optional dependencies.
+
+anthropic, requests, bs4, recipe_scrapers and Pillow add over a second to
+process start, and most requests never touch them. Modules that need one
+call require() at first use instead of importing at module level. A lean
+install without them still boots, and only the features that need them
+fail, with a clear message.
+"""
+import importlib
+import importlib.util
+import sys
+
+# module name -> pip package that provides it
+PACKAGES = {
+    "anthropic": "anthropic",
+    "bs4": "beautifulsoup4",
+    "requests": "requests",
+    "recipe_scrapers": "recipe-scrapers",
+    "PIL": "Pillow",
+    "brotli": "Brotli",
+}
+
+
+def require(module: str):
+    """Import and return module, raising ValueError if it isn't installed."""
+    cached = sys.modules.get(module)
+    if cached is not None:
+        return cached
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        top = module.split(".")[0]
+        package = PACKAGES.get(top, top)
+        raise ValueError(f"This feature needs the '{package}' package. Install it with: pip install {package}")
+
+
+def available(module: str) -> bool:
+    """True if module can be imported, without importing it."""
+    return module in sys.modules or importlib.util.find_spec(module) is not None
@@ -0,0 +1,117 @@
+"""
+Per-feature concurrency limits for slow AI and scrape endpoints.
+
+Each feature gets a fixed number of concurrent slots and a bounded wait
+queue. Waiting happens on the event loop, so queued requests don't hold
+threadpool workers that plain inventory reads need. When the queue is
+full, requests fail fast with 429. Requests that wait too long get 503.
+Both carry a Retry-After header. Identical requests already in flight
+share one result (single-flight) instead of calling the API twice.
+Single-flight keys are scoped to the current household, so households
+never share each other's results.
+"""
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from . import tenancy
+from .config import settings
+
+
+class Saturated(HTTPException):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class FeatureLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._avg_seconds = 5.0  # running estimate of one call's duration
+
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.deduplicated = 0
+
+    async def run(self, key: Optional[Hashable], fn: Callable[..., Any], *args) -> Any:
+        """Run blocking fn(*args) in a worker thread under this feature's limit."""
+        if key is not None:
+            key = (tenancy.current(), key)
+            if key in self._inflight:
+                self.deduplicated += 1
+                return await asyncio.shield(self._inflight[key])
+
+        if self.active + self.waiting >= self.max_concurrent + self.max_queue:
+            self.rejected += 1
+            raise Saturated(429, f"Too many {self.name} requests in progress. Try again shortly.", self.retry_after())
+
+        # Count as waiting now, not when the task first runs, so a burst can't overfill the queue
+        self.waiting += 1
+        task = asyncio.ensure_future(self._run(fn, *args))
+        if key is not None:
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: if this client disconnects, followers still get the result
+        return await asyncio.shield(task)
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise Saturated(503, f"{self.name} is busy. Try again shortly.", self.retry_after())
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        started = time.monotonic()
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started)
+            self.active -= 1
+            self.served += 1
+            self._sem.release()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, given the current queue."""
+        rounds = (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(rounds * self._avg_seconds))
+
+    def stats(self) -> dict:
+        return {
+            "feature": self.name,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "served": self.served,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "deduplicated": self.deduplicated,
+            "avg_seconds": round(self._avg_seconds, 2),
+        }
+
+
+recipe_suggest = FeatureLimiter(
+    "recipe_suggest", settings.recipe_suggest_concurrency, settings.ai_queue_size, settings.ai_queue_timeout_seconds
+)
+parse_list = FeatureLimiter(
+    "parse_list", settings.parse_list_concurrency, settings.ai_queue_size, settings.ai_queue_timeout_seconds
+)
+parse_url = FeatureLimiter(
+    "parse_url", settings.parse_url_concurrency, settings.ai_queue_size, settings.ai_queue_timeout_seconds
+)
+
+ALL = (recipe_suggest, parse_list, parse_url)
@@ -1,22 +1,28 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from .database import engine, Base
-from .migrate import migrate
-from .seed import seed_data
-from .routers import items, categories, locations, shopping, recipes, mealplan, appsettings
+from . import backup, jobqueue, profiling, querystats, scheduler  # noqa: F401 — backup registers its scheduled task
+from .compression import CompressionMiddleware
+from .config import settings
+from .history import ActorMiddleware
+from .startup import prepare_database
+from .staticfiles import PrecompressedStaticFiles, static_root
+from .tenancy import HouseholdMiddleware
+from .routers import items, categories, locations, shopping, recipes, mealplan, appsettings, llmusage, metrics, jobs, sync, autocomplete, stats, history
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: create tables and seed data
-    Base.metadata.create_all(bind=engine)
-    migrate()
-    seed_data()
+    # Startup: create tables and seed data (run.py --prod does this before forking)
+    if settings.init_db_on_startup:
+        prepare_database()
+    jobqueue.start()
+    scheduler.start()
     yield
-    # Shutdown (nothing to clean up for SQLite)
+    # Shutdown: let job workers and scheduled tasks finish their current pass
+    scheduler.stop()
+    jobqueue.stop()
 
 
 app = FastAPI(
@@ -33,6 +39,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ActorMiddleware)
+app.add_middleware(HouseholdMiddleware)
+app.add_middleware(querystats.QueryStatsMiddleware)
+app.add_middleware(CompressionMiddleware)
+if profiling.enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 app.include_router(items.router, prefix="/api")
 app.include_router(categories.router, prefix="/api")
@@ -41,6 +53,13 @@ app.include_router(shopping.router, prefix="/api")
 app.include_router(recipes.router, prefix="/api")
 app.include_router(mealplan.router, prefix="/api")
 app.include_router(appsettings.router, prefix="/api")
+app.include_router(llmusage.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
+app.include_router(autocomplete.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
+app.include_router(history.router, prefix="/api")
 
 # Serve frontend — must come last
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+app.mount("/", PrecompressedStaticFiles(directory=static_root(), html=True), name="static")
@@ -1,20 +1,43 @@
 """
-Migration: add meal_type to meal_plan_entries
-Run automatically at startup via main.py lifespan.
+Versioned schema migrations.
+
+Each migration is numbered and recorded in the schema_version table once
+applied. On boot, migrate() reads the current version with one query and
+returns immediately when the DB is up to date. Otherwise it applies every
+pending migration in a single transaction.
+
+Migrations must be idempotent. Migration 1 builds the full current schema
+with create_all, so on a fresh DB the later ones find their work already
+done. Pre-versioning databases run all of them and are brought up to date.
+
+Adding a migration: write a function taking a connection, append it to
+MIGRATIONS with the next number. New tables use
+Base.metadata.create_all(conn, tables=[Model.__table__]); new columns check
+_columns() first.
+
+    python -m app.migrate            # apply pending migrations
+    python -m app.migrate --check    # report status; exit 1 if any are pending
+    python -m app.migrate --household smith --create   # provision a household
 """
+import argparse
 import logging
+import os
+import sys
+import time
 from sqlalchemy import text
-from .database import engine
+from .database import engine as default_engine, Base
 
 logger = logging.getLogger(__name__)
 
 
-def migrate():
-    """Apply incremental schema migrations."""
-    with engine.connect() as conn:
-        _add_meal_type_column(conn)
-        _create_settings_table(conn)
-        conn.commit()
+def _columns(conn, table: str) -> list:
+    return [row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()]
+
+
+def _create_tables(conn):
+    """Create every table defined in models.py that doesn't exist yet."""
+    from . import models  # noqa: F401 — register all tables on Base.metadata
+    Base.metadata.create_all(bind=conn)
 
 
 def _create_settings_table(conn):
@@ -40,10 +63,7 @@ def _create_settings_table(conn):
 def _add_meal_type_column(conn):
     """Add meal_type column and update unique constraint on meal_plan_entries."""
     # Check if meal_type column already exists
-    result = conn.execute(text("PRAGMA table_info(meal_plan_entries)"))
-    columns = [row[1] for row in result.fetchall()]
-
-    if 'meal_type' in columns:
+    if 'meal_type' in _columns(conn, "meal_plan_entries"):
         logger.debug("meal_type column already exists — skipping migration")
         return
 
@@ -88,3 +108,238 @@ def _add_meal_type_column(conn):
     conn.execute(text("CREATE INDEX IF NOT EXISTS ix_meal_plan_entries_date ON meal_plan_entries (date)"))
 
     logger.info("Migration complete: meal_type column added, unique constraint updated to (date, meal_type)")
+
+
+def _create_idempotency_keys(conn):
+    from .models import IdempotencyKey
+    Base.metadata.create_all(bind=conn, tables=[IdempotencyKey.__table__])
+
+
+SYNC_TABLES = ("items", "shopping_list", "meal_plan_entries", "saved_recipes")
+
+
+def _add_sync_tracking(conn):
+    """Change sequence on syncable tables, maintained by triggers; deletes leave tombstones."""
+    from .models import SyncState, SyncTombstone
+    Base.metadata.create_all(bind=conn, tables=[SyncState.__table__, SyncTombstone.__table__])
+    conn.execute(text("INSERT OR IGNORE INTO sync_state (id, seq, compacted_through) VALUES (1, 0, 0)"))
+
+    for table in SYNC_TABLES:
+        if "change_seq" not in _columns(conn, table):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)"))
+
+        # Triggers catch every write path, including bulk query().delete()
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_sync_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE sync_state SET seq = seq + 1 WHERE id = 1;
+                UPDATE {table} SET change_seq = (SELECT seq FROM sync_state WHERE id = 1) WHERE id = NEW.id;
+            END
+        """))
+        # WHEN guard: the trigger's own change_seq update must not re-fire it
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_sync_update AFTER UPDATE ON {table}
+            WHEN NEW.change_seq = OLD.change_seq
+            BEGIN
+                UPDATE sync_state SET seq = seq + 1 WHERE id = 1;
+                UPDATE {table} SET change_seq = (SELECT seq FROM sync_state WHERE id = 1) WHERE id = NEW.id;
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_sync_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE sync_state SET seq = seq + 1 WHERE id = 1;
+                INSERT INTO sync_tombstones (seq, table_name, row_id)
+                VALUES ((SELECT seq FROM sync_state WHERE id = 1), '{table}', OLD.id);
+            END
+        """))
+
+    # Existing rows become change 1, so a client syncing from 0 receives them all
+    conn.execute(text("UPDATE sync_state SET seq = MAX(seq, 1) WHERE id = 1"))
+    for table in SYNC_TABLES:
+        conn.execute(text(f"UPDATE {table} SET change_seq = 1 WHERE change_seq = 0"))
+
+
+def _add_job_household(conn):
+    if "household" not in _columns(conn, "jobs"):
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN household VARCHAR NOT NULL DEFAULT 'default'"))
+
+
+def _create_item_digests(conn):
+    from .models import ItemDigest
+    Base.metadata.create_all(bind=conn, tables=[ItemDigest.__table__])
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_items_low_stock ON items (id) WHERE quantity <= low_threshold"))
+
+
+def _add_normalized_name(conn):
+    """normalized_name on items, backfilled in Python (SQLite's lower() is ASCII-only)."""
+    from .models import normalize_name
+    if "normalized_name" not in _columns(conn, "items"):
+        conn.execute(text("ALTER TABLE items ADD COLUMN normalized_name VARCHAR NOT NULL DEFAULT ''"))
+    rows = conn.execute(text("SELECT id, name FROM items")).fetchall()
+    updates = [{"id": id_, "n": normalize_name(name)} for id_, name in rows]
+    if updates:
+        conn.execute(text("UPDATE items SET normalized_name = :n WHERE id = :id AND normalized_name != :n"), updates)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_items_normalized_name ON items (normalized_name)"))
+
+
+def _create_inventory_rollups(conn):
+    from . import rollups
+    from .models import InventoryRollup
+    Base.metadata.create_all(bind=conn, tables=[InventoryRollup.__table__])
+    rollups.install_triggers(conn)
+    rollups.rebuild(conn)
+
+
+def _add_base_quantities(conn):
+    """Canonical base quantity/unit on items and shopping_list, backfilled in batches."""
+    from .units import to_base_many
+    for table in ("items", "shopping_list"):
+        columns = _columns(conn, table)
+        if "base_quantity" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN base_quantity FLOAT"))
+        if "base_unit" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN base_unit VARCHAR"))
+        rows = conn.execute(text(f"SELECT id, quantity, unit FROM {table}")).fetchall()
+        converted = to_base_many([r[1] for r in rows], [r[2] for r in rows])
+        updates = [{"id": r[0], "q": q, "u": u} for r, (q, u) in zip(rows, converted)]
+        if updates:
+            conn.execute(text(f"UPDATE {table} SET base_quantity = :q, base_unit = :u WHERE id = :id"), updates)
+
+
+def _create_change_history(conn):
+    from .models import ChangeHistory
+    Base.metadata.create_all(bind=conn, tables=[ChangeHistory.__table__])
+
+
+def _create_cache_versions(conn):
+    from . import dimensions
+    from .models import CacheVersion
+    Base.metadata.create_all(bind=conn, tables=[CacheVersion.__table__])
+    dimensions.install_triggers(conn)
+
+
+def _create_meal_plan_templates(conn):
+    from .models import MealPlanTemplate
+    Base.metadata.create_all(bind=conn, tables=[MealPlanTemplate.__table__])
+
+
+def _create_recipe_ingredients(conn):
+    from .models import RecipeIngredient
+    Base.metadata.create_all(bind=conn, tables=[RecipeIngredient.__table__])
+
+
+# (version, description, function) — append only, never renumber
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "meal_type column on meal_plan_entries", _add_meal_type_column),
+    (3, "app_settings table and defaults", _create_settings_table),
+    (4, "idempotency_keys table", _create_idempotency_keys),
+    (5, "change sequence and tombstones for delta sync", _add_sync_tracking),
+    (6, "household column on jobs", _add_job_household),
+    (7, "item_digests table and low-stock index", _create_item_digests),
+    (8, "normalized_name on items", _add_normalized_name),
+    (9, "inventory_rollups table and triggers", _create_inventory_rollups),
+    (10, "base quantity and unit on items and shopping_list", _add_base_quantities),
+    (11, "change_history table", _create_change_history),
+    (12, "cache_versions table and dimension triggers", _create_cache_versions),
+    (13, "meal_plan_templates table", _create_meal_plan_templates),
+    (14, "recipe_ingredients parse cache", _create_recipe_ingredients),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    """Highest applied migration, or 0 for a DB that predates versioning."""
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    )).first()
+    if not exists:
+        return 0
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def migrate(engine=None) -> int:
+    """Apply pending schema migrations. Returns how many were applied."""
+    started = time.perf_counter()
+    with (engine or default_engine).connect() as conn:
+        # Manage the transaction by hand: pysqlite otherwise runs DDL outside of one
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        if current_version(conn) >= LATEST:
+            logger.info("Schema is current (v%d), checked in %.1f ms", LATEST, (time.perf_counter() - started) * 1000)
+            return 0
+
+        # IMMEDIATE takes the write lock up front, so concurrent starters queue here
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version    INTEGER PRIMARY KEY NOT NULL,
+                    name       TEXT NOT NULL,
+                    applied_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+                )
+            """))
+            version = current_version(conn)  # re-read under the lock
+            pending = [m for m in MIGRATIONS if m[0] > version]
+            for number, name, fn in pending:
+                logger.info("Applying migration %d: %s", number, name)
+                fn(conn)
+                conn.execute(
+                    text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+                    {"version": number, "name": name},
+                )
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+
+    logger.info(
+        "Migrated schema v%d → v%d in %.1f ms",
+        version, LATEST, (time.perf_counter() - started) * 1000,
+    )
+    return len(pending)
+
+
+def check(engine=None) -> int:
+    """Print migration status. Returns a process exit code: 1 if anything is pending."""
+    started = time.perf_counter()
+    with (engine or default_engine).connect() as conn:
+        version = current_version(conn)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    print(f"Schema version {version} of {LATEST} (checked in {elapsed:.1f} ms)")
+    for number, name, _ in pending:
+        print(f"  pending {number}: {name}")
+    return 1 if pending else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or check schema migrations")
+    parser.add_argument("--check", action="store_true", help="report pending migrations without applying them")
+    parser.add_argument("--household", help="a household's database instead of the default one")
+    parser.add_argument("--create", action="store_true", help="provision --household: create, migrate and seed its database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    target = None
+    if args.household:
+        from .config import settings
+        from .database import make_engine
+        from .tenancy import database_url, provisioned, validate
+        household = validate(args.household)
+        if not provisioned(household):
+            if not args.create:
+                sys.exit(f"Household '{household}' does not exist; pass --create to provision it")
+            os.makedirs(settings.household_data_dir, exist_ok=True)
+        target = make_engine(database_url(household))
+        if args.create:
+            from .startup import prepare_database
+            prepare_database(target)
+            print(f"Household '{household}' is ready")
+            sys.exit(0)
+    if args.check:
+        sys.exit(check(target))
+    migrate(target)
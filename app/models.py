@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Boolean, UniqueConstraint, Index
+from sqlalchemy import event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
+from .units import to_base
 
 
 class Category(Base):
@@ -24,11 +26,31 @@ class Location(Base):
     items = relationship("Item", back_populates="location")
 
 
+def normalize_name(name: str) -> str:
+    """Grouping key for item names; same rule the inventory UI uses."""
+    return (name or "").strip().lower()
+
+
+def _default_normalized_name(context) -> str:
+    # Column default for Core inserts (bulk import), which skip @validates
+    return normalize_name(context.get_current_parameters().get("name"))
+
+
+def _default_base_quantity(context) -> float:
+    params = context.get_current_parameters()
+    return to_base(params.get("quantity", 1.0), params.get("unit"))[0]
+
+
+def _default_base_unit(context) -> str:
+    return to_base(1.0, context.get_current_parameters().get("unit"))[1]
+
+
 class Item(Base):
     __tablename__ = "items"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
+    normalized_name = Column(String, nullable=False, default=_default_normalized_name, index=True)
     quantity = Column(Float, default=1.0)
     unit = Column(String, default="")
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
@@ -36,11 +58,25 @@ class Item(Base):
     expiration_date = Column(Date, nullable=True, index=True)
     notes = Column(String, default="")
     low_threshold = Column(Float, default=1.0)
+    base_quantity = Column(Float, default=_default_base_quantity)  # quantity in g / ml / each (app/units.py)
+    base_unit = Column(String, default=_default_base_unit)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)  # set by sync triggers
+
+    # Item responses fill these from the dimension cache (app/dimensions.py), not a join
+    category = relationship("Category", back_populates="items")
+    location = relationship("Location", back_populates="items")
+
+    __table_args__ = (
+        # Partial index: low-stock lookups read only the rows that are low
+        Index("ix_items_low_stock", "id", sqlite_where=quantity <= low_threshold),
+    )
 
-    category = relationship("Category", back_populates="items", lazy="joined")
-    location = relationship("Location", back_populates="items", lazy="joined")
+    @validates("name")
+    def _set_normalized_name(self, key, value):
+        self.normalized_name = normalize_name(value)
+        return value
 
 
 class ShoppingListItem(Base):
@@ -50,14 +86,26 @@ class ShoppingListItem(Base):
     name = Column(String, nullable=False)
     quantity = Column(Float, default=1.0)
     unit = Column(String, default="")
+    base_quantity = Column(Float, default=_default_base_quantity)
+    base_unit = Column(String, default=_default_base_unit)
     is_checked = Column(Boolean, default=False)
     source = Column(String, default="manual")  # "manual" or "auto"
     item_id = Column(Integer, ForeignKey("items.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)  # set by sync triggers
 
     item = relationship("Item")
 
 
+@event.listens_for(Item, "before_insert")
+@event.listens_for(Item, "before_update")
+@event.listens_for(ShoppingListItem, "before_insert")
+@event.listens_for(ShoppingListItem, "before_update")
+def _set_base_quantity(mapper, connection, target):
+    quantity = 1.0 if target.quantity is None else target.quantity
+    target.base_quantity, target.base_unit = to_base(quantity, target.unit)
+
+
 class MealPlanEntry(Base):
     __tablename__ = "meal_plan_entries"
 
@@ -68,9 +116,10 @@ class MealPlanEntry(Base):
     meal_type = Column(String, nullable=False, default='dinner')
     meal_name = Column(String, nullable=False)
     notes = Column(String, default="")
-    recipe_id = Column(Integer, nullable=True)  # future-proofing, unused in Phase 1
+    recipe_id = Column(Integer, nullable=True)  # saved recipe feeding shopping generation
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)  # set by sync triggers
 
 
 class AppSetting(Base):
@@ -106,3 +155,138 @@ class SavedRecipe(Base):
     tags = Column(String, default="[]")  # JSON array of slugs stored as text
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)  # set by sync triggers
+
+
+class LlmCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feature = Column(String, nullable=False, index=True)  # "recipe_suggest" / "parse_list" / "scrape_fallback"
+    model = Column(String, nullable=False)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)
+    cache_creation_tokens = Column(Integer, default=0)
+    latency_ms = Column(Integer, default=0)
+    outcome = Column(String, default="ok")  # "ok" / "truncated" / "error"
+    error = Column(String, default="")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    kind = Column(String, nullable=False)  # "recipe_suggest" / "parse_list" / "parse_url"
+    household = Column(String, nullable=False, default="default")  # database the handler runs against
+    status = Column(String, nullable=False, default="queued", index=True)  # queued / running / done / failed
+    payload = Column(String, nullable=False, default="{}")  # JSON object stored as text
+    result = Column(String, nullable=True)  # JSON stored as text
+    error = Column(String, default="")
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    timeout_seconds = Column(Float, default=120.0)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # client-supplied Idempotency-Key header
+    method = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    body = Column(String, default="")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    id = Column(Integer, primary_key=True)  # single row, id = 1
+    seq = Column(Integer, nullable=False, default=0)  # last change sequence handed out
+    compacted_through = Column(Integer, nullable=False, default=0)  # tombstones up to here are gone
+
+
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class ItemDigest(Base):
+    __tablename__ = "item_digests"
+
+    id = Column(Integer, primary_key=True)
+    payload = Column(String, nullable=False)  # ItemDigest schema as JSON
+    fingerprint = Column(String, nullable=False)  # hash of the item ids per section; delivery only on change
+    delivered = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class InventoryRollup(Base):
+    """Item counts per location / category and expiry date, maintained by triggers (app/rollups.py)."""
+    __tablename__ = "inventory_rollups"
+
+    dimension = Column(String, primary_key=True)  # "location" / "category"
+    dim_id = Column(Integer, primary_key=True)  # 0 when the item has none
+    expiration_date = Column(String, primary_key=True, default="")  # ISO date, "" when none
+    item_count = Column(Integer, nullable=False, default=0)
+    low_count = Column(Integer, nullable=False, default=0)
+
+
+class ChangeHistory(Base):
+    """Append-only audit log, one narrow row per change (app/history.py)."""
+    __tablename__ = "change_history"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # "item" / "shopping" / "meal_plan"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # create / update / delete / day (compacted)
+    changes = Column(String, nullable=False)  # JSON {field: [old, new]}
+    actor = Column(String, default="")  # X-Actor header, if the client sent one
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (Index("ix_change_history_entity", "entity", "entity_id", "id"),)
+
+
+class CacheVersion(Base):
+    """Write counters for in-process caches, bumped by triggers (app/dimensions.py)."""
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class MealPlanTemplate(Base):
+    """A named week of meals that can be stamped onto any week (app/services/mealplan_service.py)."""
+    __tablename__ = "meal_plan_templates"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    entries = Column(String, nullable=False, default="[]")  # JSON [{weekday, meal_type, meal_name, notes}]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RecipeIngredient(Base):
+    """Parsed ingredient lines of a saved recipe, a cache keyed by source_hash (app/services/ingredient_service.py)."""
+    __tablename__ = "recipe_ingredients"
+
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey("saved_recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    line = Column(String, nullable=False)
+    source_hash = Column(String, nullable=False)  # hash of saved_recipes.ingredients when parsed
+    name = Column(String, nullable=False)
+    normalized_name = Column(String, nullable=False)
+    quantity = Column(Float, nullable=True)  # None for "salt to taste"
+    unit = Column(String, default="")
+    base_quantity = Column(Float, nullable=True)
+    base_unit = Column(String, nullable=False)
@@ -0,0 +1,177 @@
+"""
+Opt-in per-request sampling profiler.
+
+A request is profiled when it carries X-Profile: <PROFILE_TOKEN>, or when it
+is picked at random with probability PROFILE_SAMPLE_RATE. While the handler
+runs, a background thread samples the event loop and threadpool stacks every
+PROFILE_INTERVAL_MS. It keeps only stacks that pass through app code, which
+drops idle workers. Concurrent requests can still show up in a profile.
+
+Each profile is written to PROFILE_DIR as collapsed stacks (<stamp>.folded,
+one "frame;frame;frame count" line per stack, for flamegraph.pl or
+speedscope) plus a <stamp>.json sidecar with the route and timing. Only the
+newest PROFILE_KEEP are kept. GET /api/metrics/profiles lists them.
+
+main.py only installs the middleware when profiling is configured, so the
+default setup pays nothing for it.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from . import tenancy
+from .config import settings
+
+HEADER = b"x-profile"
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_WORKER_PREFIX = "AnyIO worker thread"
+
+
+def enabled() -> bool:
+    return bool(settings.profile_token) or settings.profile_sample_rate > 0
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_APP_DIR):
+        path = "app/" + path[len(_APP_DIR):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+class _Sampler:
+    """Collects collapsed stacks from the loop thread and threadpool workers."""
+
+    def __init__(self, loop_thread: int):
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        interval = settings.profile_interval_ms / 1000
+        while not self._stop.wait(interval):
+            self.samples += 1
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != self.loop_thread and not names.get(ident, "").startswith(_WORKER_PREFIX):
+                    continue
+                labels = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(_APP_DIR)
+                    labels.append(_frame_label(code))
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(labels))] += 1
+
+
+class ProfilingMiddleware:
+    """Profile requests selected by header or sample rate."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with _Sampler(threading.get_ident()) as sampler:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+        route = scope.get("route")
+        meta = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", scope["path"]),
+            "status": status["code"],
+            "duration_ms": round(elapsed_ms, 1),
+            "samples": sampler.samples,
+            "household": tenancy.current(),
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        }
+        await run_in_threadpool(_save, meta, sampler.stacks)
+
+    @staticmethod
+    def _selected(scope) -> bool:
+        if settings.profile_token:
+            for key, value in scope["headers"]:
+                if key == HEADER:
+                    return value.decode("latin-1") == settings.profile_token
+        return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+def _save(meta: dict, stacks: Counter) -> None:
+    os.makedirs(settings.profile_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(settings.profile_dir, stamp)
+    meta["name"] = stamp
+    with open(base + ".folded", "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    # Sidecar last: list_profiles only sees complete profiles
+    with open(base + ".json.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(base + ".json.tmp", base + ".json")
+    for old in _names()[settings.profile_keep:]:
+        for ext in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(settings.profile_dir, old + ext))
+            except OSError:
+                pass
+
+
+def _names() -> List[str]:
+    if not os.path.isdir(settings.profile_dir):
+        return []
+    return sorted((n[:-5] for n in os.listdir(settings.profile_dir) if n.endswith(".json")), reverse=True)
+
+
+def list_profiles(limit: int = 50) -> List[dict]:
+    """Metadata of the most recent profiles, newest first."""
+    profiles = []
+    for name in _names()[:limit]:
+        try:
+            with open(os.path.join(settings.profile_dir, name + ".json")) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a profile's collapsed stacks, or None for unknown names."""
+    if name not in _names():
+        return None
+    return os.path.join(settings.profile_dir, name + ".folded")
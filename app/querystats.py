@@ -0,0 +1,245 @@
+"""
+Per-request SQL query counting and N+1 detection.
+
+Engine-level cursor events count every statement and its time against the
+request that issued it. The request is tracked through a ContextVar, which
+threadpool handlers inherit. QueryStatsMiddleware reports the totals in
+X-Query-Count / X-Query-Time-Ms and Server-Timing response headers and
+keeps per-route totals for GET /api/metrics/queries. If one SELECT runs
+QUERY_REPEAT_THRESHOLD or more times in a request, the request is logged
+as a likely N+1.
+
+Query budgets for the main endpoints live in BUDGETS. CI runs
+(.github/workflows/query-budgets.yml, on the lean requirements):
+
+    python -m app.querystats
+
+This seeds a scratch database, calls each budgeted endpoint and exits
+non-zero when one issues more queries than its budget. Code paths that
+bypass HTTP can use max_queries(n) as a context manager.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_BULK = {"items": [{"name": f"Bulk {i}", "quantity": 1} for i in range(5)]}
+_MONDAY = date.today() - timedelta(days=date.today().weekday())
+_WEEK = {"entries": [
+    {"date": (_MONDAY + timedelta(days=d)).isoformat(), "meal_type": meal, "meal_name": f"{meal} {d}"}
+    for d in range(7) for meal in ("breakfast", "lunch", "dinner")
+]}
+
+# (method, path, JSON body, max queries) against the data seeded by _seed(),
+# with a warm dimension cache (categories, locations, tags and settings cost
+# nothing; in production add one version check per second)
+BUDGETS = [
+    ("GET", "/api/items", None, 1),
+    ("GET", "/api/items?fields=name,quantity,category,is_low", None, 1),
+    ("GET", "/api/items/grouped", None, 1),
+    ("GET", "/api/items/1", None, 1),
+    ("GET", "/api/stats", None, 1),
+    ("GET", "/api/categories", None, 0),
+    ("GET", "/api/locations", None, 0),
+    ("GET", "/api/shopping", None, 1),
+    # 7 low items: the two lookups, one INSERT per new row, history, one reload
+    ("POST", "/api/shopping/auto-suggest", None, 11),
+    # 5 rows: one INSERT each, history, one reload
+    ("POST", "/api/items/bulk", _BULK, 7),
+    ("GET", "/api/mealplan", None, 1),
+    ("GET", f"/api/mealplan/range?start={_MONDAY}&end={_MONDAY + timedelta(days=27)}", None, 1),
+    # 21 slots: existing rows, one upsert, history, one reload
+    ("PUT", "/api/mealplan/bulk", _WEEK, 4),
+    # first run also fills the ingredient parse cache (delete + insert)
+    ("POST", "/api/shopping/from-mealplan?dry_run=true", None, 7),
+    ("GET", "/api/recipes/saved", None, 2),
+    ("GET", "/api/recipes/saved?fields=title,thumbnail_url", None, 1),
+    ("GET", "/api/settings", None, 0),
+    ("GET", "/api/recipes/tags", None, 0),
+    ("GET", "/api/history?entity=item&id=1", None, 1),
+    # sync state, one SELECT per synced table, tombstones
+    ("GET", "/api/sync?since=0", None, 6),
+]
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self):
+        """SELECTs run often enough in one request to look like an N+1.
+
+        Repeated INSERTs are left out: a flush of several new rows issues one
+        INSERT per row on SQLite, inside a single transaction.
+        """
+        return [
+            (sql, n) for sql, n in self.statements.most_common()
+            if n >= settings.query_repeat_threshold and sql.lstrip()[:6].upper() == "SELECT"
+        ]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+_routes: dict = {}
+_routes_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info["query_started"].pop()
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started
+    stats.statements[statement] += 1
+
+
+@contextmanager
+def max_queries(limit: int, label: str = "block"):
+    """Fail with AssertionError if the enclosed code issues more than limit queries."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.count > limit:
+        raise AssertionError(f"{label} ran {stats.count} queries (budget {limit})")
+
+
+def route_stats() -> list:
+    """Per-route query totals since process start, heaviest first."""
+    with _routes_lock:
+        rows = [dict(route=route, **totals) for route, totals in _routes.items()]
+    for row in rows:
+        row["avg_queries"] = round(row["queries"] / row["requests"], 2)
+        row["sql_ms"] = round(row["sql_ms"], 1)
+    return sorted(rows, key=lambda r: r["queries"], reverse=True)
+
+
+def _record(scope, stats: QueryStats) -> None:
+    route = scope.get("route")
+    key = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+    repeated = stats.repeated()
+    with _routes_lock:
+        totals = _routes.setdefault(
+            key, {"requests": 0, "queries": 0, "max_queries": 0, "sql_ms": 0.0, "n_plus_one": 0, "last_repeated": None}
+        )
+        totals["requests"] += 1
+        totals["queries"] += stats.count
+        totals["max_queries"] = max(totals["max_queries"], stats.count)
+        totals["sql_ms"] += stats.seconds * 1000
+        if repeated:
+            totals["n_plus_one"] += 1
+            totals["last_repeated"] = repeated[0][0][:300]
+    for sql, n in repeated:
+        logger.warning("Possible N+1 in %s: ran %d times: %s", key, n, " ".join(sql.split())[:200])
+
+
+class QueryStatsMiddleware:
+    """Count each request's SQL and report it in response headers and route totals."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.query_stats_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                ms = stats.seconds * 1000
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-query-count", str(stats.count).encode()),
+                    (b"x-query-time-ms", f"{ms:.1f}".encode()),
+                    (b"server-timing", f'db;dur={ms:.1f};desc="{stats.count} queries"'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+        if stats.count:
+            _record(scope, stats)
+
+
+def _seed(client) -> None:
+    for i in range(10):
+        client.post("/api/items", json={
+            "name": f"Item {i}", "quantity": i % 3, "unit": "kg" if i % 2 else "", "low_threshold": 1,
+            "category_id": 1, "location_id": 1,
+        })
+    client.post("/api/shopping", json={"name": "Bread", "quantity": 1})
+    client.post("/api/mealplan", json={"date": time.strftime("%Y-%m-%d"), "meal_type": "dinner", "meal_name": "Soup"})
+    client.post("/api/recipes/saved", json={"title": "Soup", "ingredients": ["water"], "instructions": ["boil"], "tags": ["easy"]})
+
+
+def check_budgets(client) -> list:
+    """Call every budgeted endpoint; returns (method, path, count, budget) for each one over budget."""
+    failures = []
+    for method, path, body, budget in BUDGETS:
+        response = client.request(method, path, json=body)
+        if response.status_code >= 400:
+            failures.append((method, path, f"HTTP {response.status_code}", budget))
+            continue
+        count = int(response.headers["x-query-count"])
+        if count > budget:
+            failures.append((method, path, count, budget))
+    return failures
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the app at a scratch database before anything opens an engine
+        settings.database_url = f"sqlite:///{tmp}/budget.db"
+        settings.households_enabled = False
+        settings.query_stats_enabled = True
+        from fastapi.testclient import TestClient
+
+        from . import dimensions
+        from .main import app
+        from .startup import prepare_database
+
+        prepare_database()
+        client = TestClient(app)
+        _seed(client)
+        # Keep the cache's once-a-second version check out of the counts
+        dimensions.CHECK_SECONDS = float("inf")
+        client.get("/api/categories")
+        failures = check_budgets(client)
+        for method, path, count, budget in failures:
+            print(f"OVER BUDGET  {method} {path}: {count} queries (budget {budget})")
+        print(f"{len(BUDGETS) - len(failures)}/{len(BUDGETS)} endpoints within query budget")
+    sys.exit(1 if failures else 0)
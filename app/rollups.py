@@ -0,0 +1,126 @@
+"""
+Trigger-maintained inventory rollups behind /api/stats.
+
+inventory_rollups holds item and low-stock counts per (location or
+category, expiration date). Triggers on items adjust the affected rows on
+every insert, update and delete, so dashboard counts come from one small
+indexed read instead of a scan of items. Bucketing by expiration date
+keeps expired and expiring counts exact as days pass: "expiring" is just
+a date range over the buckets.
+
+Triggers can only drift if someone edits the DB with them disabled, or
+restores an old table. This command compares the rollups against a
+fresh aggregate and can rebuild them:
+
+    python -m app.rollups              # report drift; exit 1 if any
+    python -m app.rollups --rebuild    # recompute from items
+    python -m app.rollups --household smiths --rebuild
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = {"location": "location_id", "category": "category_id"}
+
+_AGGREGATE = """
+    SELECT '{dim}', COALESCE({col}, 0), COALESCE(expiration_date, ''),
+           COUNT(*), SUM(CASE WHEN quantity <= low_threshold THEN 1 ELSE 0 END)
+    FROM items GROUP BY 2, 3
+"""
+
+
+def _apply(sign: str, row: str) -> str:
+    """Statements adding (+) or removing (-) one items row (NEW or OLD) from every dimension."""
+    statements = []
+    for dim, col in DIMENSIONS.items():
+        low = f"(CASE WHEN {row}.quantity <= {row}.low_threshold THEN 1 ELSE 0 END)"
+        statements.append(f"""
+                INSERT INTO inventory_rollups (dimension, dim_id, expiration_date, item_count, low_count)
+                VALUES ('{dim}', COALESCE({row}.{col}, 0), COALESCE({row}.expiration_date, ''), {sign}1, {sign}{low})
+                ON CONFLICT (dimension, dim_id, expiration_date) DO UPDATE SET
+                    item_count = item_count + excluded.item_count,
+                    low_count = low_count + excluded.low_count;""")
+    return "".join(statements)
+
+
+def install_triggers(conn) -> None:
+    # Recreated on every install so changes to the definitions take effect
+    for name in ("items_rollup_insert", "items_rollup_update", "items_rollup_delete"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+    conn.execute(text(f"""
+        CREATE TRIGGER items_rollup_insert AFTER INSERT ON items
+        BEGIN{_apply("+", "NEW")}
+        END
+    """))
+    # Only the columns that feed the rollups; quantity +/- on a non-low item is a no-op
+    conn.execute(text(f"""
+        CREATE TRIGGER items_rollup_update AFTER UPDATE ON items
+        WHEN OLD.location_id IS NOT NEW.location_id
+          OR OLD.category_id IS NOT NEW.category_id
+          OR OLD.expiration_date IS NOT NEW.expiration_date
+          OR (OLD.quantity <= OLD.low_threshold) IS NOT (NEW.quantity <= NEW.low_threshold)
+        BEGIN{_apply("-", "OLD")}{_apply("+", "NEW")}
+            DELETE FROM inventory_rollups WHERE item_count = 0;
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER items_rollup_delete AFTER DELETE ON items
+        BEGIN{_apply("-", "OLD")}
+            DELETE FROM inventory_rollups WHERE item_count = 0;
+        END
+    """))
+
+
+def rebuild(conn) -> None:
+    conn.execute(text("DELETE FROM inventory_rollups"))
+    for dim, col in DIMENSIONS.items():
+        conn.execute(text(
+            "INSERT INTO inventory_rollups (dimension, dim_id, expiration_date, item_count, low_count)"
+            + _AGGREGATE.format(dim=dim, col=col)
+        ))
+
+
+def drift(conn) -> list:
+    """Rows where the stored rollups disagree with a fresh aggregate."""
+    fresh = set()
+    for dim, col in DIMENSIONS.items():
+        fresh |= {tuple(r) for r in conn.execute(text(_AGGREGATE.format(dim=dim, col=col))).fetchall()}
+    stored = {tuple(r) for r in conn.execute(text(
+        "SELECT dimension, dim_id, expiration_date, item_count, low_count FROM inventory_rollups"
+    )).fetchall()}
+    return sorted(fresh ^ stored)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or rebuild inventory rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute rollups from the items table")
+    parser.add_argument("--household", help="a household's database instead of the default one")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from .database import engine, make_engine
+    target = engine
+    if args.household:
+        from .tenancy import database_url, provisioned, validate
+        household = validate(args.household)
+        if not provisioned(household):
+            sys.exit(f"Household '{household}' does not exist")
+        target = make_engine(database_url(household))
+
+    if args.rebuild:
+        with target.begin() as conn:
+            rebuild(conn)
+        print("Rollups rebuilt")
+        sys.exit(0)
+
+    with target.connect() as conn:
+        rows = drift(conn)
+    print(f"{len(rows)} rollup rows out of sync" if rows else "Rollups are consistent")
+    for row in rows[:20]:
+        print(f"  {row}")
+    sys.exit(1 if rows else 0)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from ..database import get_db
+from ..schemas import AutocompleteOut
+from ..services import autocomplete_service
+
+router = APIRouter()
+
+
+@router.get("/autocomplete", response_model=List[AutocompleteOut])
+def autocomplete(
+    q: str = Query("", max_length=100),
+    limit: int = Query(8, ge=1, le=25),
+    db: Session = Depends(get_db),
+):
+    """Names from inventory, shopping history and recipe ingredients matching a prefix."""
+    return autocomplete_service.suggest(db, q, limit)
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 
+from .. import dimensions
 from ..database import get_db
-from ..models import Category
 from ..schemas import CategoryOut
 
 router = APIRouter()
@@ -11,4 +11,4 @@ router = APIRouter()
 
 @router.get("/categories", response_model=List[CategoryOut])
 def list_categories(db: Session = Depends(get_db)):
-    return db.query(Category).order_by(Category.sort_order).all()
+    return list(dimensions.get(db).categories.values())
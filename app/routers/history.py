@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from ..database import get_db
+from ..history import ENTITIES
+from ..models import ChangeHistory
+from ..schemas import HistoryPage
+
+router = APIRouter()
+
+
+@router.get("/history", response_model=HistoryPage)
+def list_history(
+    entity: Optional[str] = Query(None, description="item, shopping or meal_plan"),
+    id: Optional[int] = Query(None, description="entity id; requires entity"),
+    before: Optional[int] = Query(None, description="next_before from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """Newest-first change history, paged by id so pages stay stable as new changes arrive."""
+    if entity is not None and entity not in ENTITIES:
+        raise HTTPException(status_code=400, detail=f"entity must be one of: {', '.join(ENTITIES)}")
+    if id is not None and entity is None:
+        raise HTTPException(status_code=400, detail="id requires entity")
+
+    query = db.query(ChangeHistory)
+    if entity is not None:
+        query = query.filter(ChangeHistory.entity == entity)
+    if id is not None:
+        query = query.filter(ChangeHistory.entity_id == id)
+    if before is not None:
+        query = query.filter(ChangeHistory.id < before)
+
+    rows = query.order_by(ChangeHistory.id.desc()).limit(limit + 1).all()
+    entries = rows[:limit]
+    return {
+        "entries": entries,
+        "next_before": entries[-1].id if len(rows) > limit else None,
+    }
@@ -1,14 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, distinct, func
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date, timedelta
 
+from .. import dimensions, limiter
 from ..database import get_db
-from ..models import Item
-from ..schemas import ItemCreate, ItemUpdate, ItemOut, QuantityAdjust, ItemBulkCreate, ParseListRequest, ParsedItem
+from ..fieldsets import FieldSet
+from ..idempotency import IdempotentRoute
+from ..models import Item, Location, normalize_name
+from ..schemas import (
+    ItemCreate, ItemUpdate, ItemOut, QuantityAdjust, ItemBulkCreate, ParseListRequest, ParsedItem, ItemImportResult,
+    ItemDigestOut, ItemGroupOut,
+)
+from ..services import digest_service, transfer_service
 from ..services.import_service import parse_item_list
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
+
+# Uploads larger than this spill from memory to a temp file
+_SPOOL_BYTES = 1024 * 1024
+
+
+def _dimension(dim):
+    return dim._asdict() if dim is not None else None
+
+
+# ?fields= on GET /items; category and location come from the dimension cache
+ITEM_FIELDS = FieldSet(Item, ItemOut, derived={
+    "category": (("category_id",), lambda row, snapshot: _dimension(snapshot.categories.get(row.category_id))),
+    "location": (("location_id",), lambda row, snapshot: _dimension(snapshot.locations.get(row.location_id))),
+    "is_low": (("quantity", "low_threshold"), None),
+    "is_expired": (("expiration_date",), None),
+    "is_expiring_soon": (("expiration_date",), None),
+})
 
 
 @router.get("/items", response_model=List[ItemOut])
@@ -19,7 +48,12 @@ def list_items(
     search: Optional[str] = Query(None),
     low_only: bool = Query(False),
     expiring_days: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None, description="comma-separated ItemOut fields to return; id is always included"),
 ):
+    try:
+        names = ITEM_FIELDS.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     query = db.query(Item)
 
     if category_id:
@@ -37,7 +71,11 @@ def list_items(
             Item.expiration_date >= date.today(),
         )
 
-    return query.order_by(Item.name).all()
+    query = query.order_by(Item.name)
+    if names:
+        snapshot = dimensions.get(db) if {"category", "location"} & set(names) else None
+        return ITEM_FIELDS.response(ITEM_FIELDS.select(query, names), names, snapshot)
+    return dimensions.hydrate(db, query.all())
 
 
 @router.post("/items", response_model=ItemOut, status_code=201)
@@ -46,15 +84,15 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
-    return db_item
+    return dimensions.hydrate(db, [db_item])[0]
 
 
 @router.post("/items/parse-list", response_model=List[ParsedItem])
-def parse_list(req: ParseListRequest):
+async def parse_list(req: ParseListRequest):
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
     try:
-        return parse_item_list(req.text)
+        return await limiter.parse_list.run(req.text.strip(), parse_item_list, req.text)
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
 
@@ -66,10 +104,108 @@ def bulk_create_items(payload: ItemBulkCreate, db: Session = Depends(get_db)):
         db_item = Item(**item_data.model_dump())
         db.add(db_item)
         db_items.append(db_item)
+    db.flush()
+    ids = [db_item.id for db_item in db_items]  # read before commit expires them
     db.commit()
-    for db_item in db_items:
-        db.refresh(db_item)
-    return db_items
+    # One query to load defaults instead of a refresh per row
+    return dimensions.hydrate(db, db.query(Item).filter(Item.id.in_(ids)).order_by(Item.id).all())
+
+
+@router.post("/items/import", response_model=ItemImportResult)
+async def import_items(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults from Content-Type"),
+    db: Session = Depends(get_db),
+):
+    """Import items from a raw CSV or NDJSON request body. Invalid rows are skipped and reported."""
+    try:
+        fmt = transfer_service.detect_format(format, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            return await run_in_threadpool(transfer_service.import_items, db, upload, fmt)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="File must be UTF-8 text")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/items/export")
+def export_items(format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    filename = f"kitchenventory-items-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        transfer_service.export_items(format),
+        media_type=transfer_service.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/items/grouped", response_model=List[ItemGroupOut])
+def list_grouped_items(
+    db: Session = Depends(get_db),
+    category_id: Optional[int] = Query(None),
+    location_id: Optional[int] = Query(None),
+    search: Optional[str] = Query(None),
+    low_only: bool = Query(False),
+):
+    """One row per item name with totals across locations, aggregated in a single GROUP BY."""
+    is_low = Item.quantity <= Item.low_threshold
+    entry = func.json_object(
+        "id", Item.id,
+        "location_id", Item.location_id,
+        "location", Location.name,
+        "quantity", Item.quantity,
+        "expiration_date", Item.expiration_date,
+        "is_low", case((is_low, True), else_=False),
+    )
+    any_low = func.max(case((is_low, 1), else_=0))
+    query = (
+        db.query(
+            Item.normalized_name,
+            func.min(Item.name).label("name"),
+            func.min(Item.unit).label("unit"),
+            func.min(Item.category_id).label("category_id"),
+            func.sum(Item.quantity).label("total_quantity"),
+            func.count(Item.id).label("item_count"),
+            func.count(distinct(Item.location_id)).label("location_count"),
+            func.min(Item.expiration_date).label("soonest_expiration"),
+            any_low.label("any_low"),
+            # Only meaningful when every row converts to the same base unit
+            case((func.count(distinct(Item.base_unit)) == 1, func.sum(Item.base_quantity))).label("total_base_quantity"),
+            case((func.count(distinct(Item.base_unit)) == 1, func.min(Item.base_unit))).label("base_unit"),
+            func.json_group_array(func.json(entry)).label("entries"),
+        )
+        .outerjoin(Location, Item.location_id == Location.id)
+    )
+
+    if category_id:
+        query = query.filter(Item.category_id == category_id)
+    if location_id:
+        query = query.filter(Item.location_id == location_id)
+    if search:
+        query = query.filter(Item.normalized_name.contains(normalize_name(search), autoescape=True))
+
+    query = query.group_by(Item.normalized_name).order_by(Item.normalized_name)
+    if low_only:
+        query = query.having(any_low == 1)
+
+    return [{**row._asdict(), "entries": json.loads(row.entries)} for row in query.all()]
+
+
+@router.get("/items/digest", response_model=ItemDigestOut)
+def get_digest(db: Session = Depends(get_db)):
+    """Expired, expiring and low-stock items by location, as of the last scheduled scan."""
+    digest = digest_service.latest(db)
+    if digest is None:
+        # First request before the scheduler's first pass
+        digest_service.refresh(db)
+        digest = digest_service.latest(db)
+    return digest
 
 
 @router.get("/items/{item_id}", response_model=ItemOut)
@@ -77,7 +213,7 @@ def get_item(item_id: int, db: Session = Depends(get_db)):
     item = db.query(Item).filter(Item.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return dimensions.hydrate(db, [item])[0]
 
 
 @router.put("/items/{item_id}", response_model=ItemOut)
@@ -91,7 +227,7 @@ def update_item(item_id: int, item_data: ItemUpdate, db: Session = Depends(get_d
 
     db.commit()
     db.refresh(item)
-    return item
+    return dimensions.hydrate(db, [item])[0]
 
 
 @router.delete("/items/{item_id}", status_code=204)
@@ -112,4 +248,4 @@ def adjust_quantity(item_id: int, adjust: QuantityAdjust, db: Session = Depends(
     item.quantity = max(0.0, item.quantity + adjust.delta)
     db.commit()
     db.refresh(item)
-    return item
+    return dimensions.hydrate(db, [item])[0]
@@ -0,0 +1,126 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .. import dimensions, jobqueue, tenancy
+from ..database import ControlSession, SessionLocal
+from ..models import Item, Job
+from ..schemas import (
+    JobCreate, JobOut, RecipeRequest, ParseListRequest, ParsedItem, ParseUrlRequest, ParsedRecipe
+)
+from ..services.recipe_service import get_recipe_suggestions
+from ..services.import_service import parse_item_list
+from ..services.scrape_service import scrape_recipe_url
+
+router = APIRouter()
+
+# Request schema used to validate each job kind's payload before it is queued
+JOB_PAYLOADS = {
+    "recipe_suggest": RecipeRequest,
+    "parse_list": ParseListRequest,
+    "parse_url": ParseUrlRequest,
+}
+
+_SSE_POLL_SECONDS = 0.5
+_SSE_KEEPALIVE_SECONDS = 15
+
+
+@jobqueue.handler("recipe_suggest")
+def _run_recipe_suggest(payload: dict):
+    req = RecipeRequest(**payload)
+    db = SessionLocal()
+    try:
+        items = dimensions.hydrate(db, db.query(Item).filter(Item.quantity > 0).all())
+        if not items:
+            raise ValueError("No items in inventory to suggest recipes from.")
+        return {"recipes": get_recipe_suggestions(items, req.dietary_notes)}
+    finally:
+        db.close()
+
+
+@jobqueue.handler("parse_list")
+def _run_parse_list(payload: dict):
+    req = ParseListRequest(**payload)
+    if not req.text.strip():
+        raise ValueError("Text is required")
+    return [ParsedItem(**p).model_dump() for p in parse_item_list(req.text)]
+
+
+@jobqueue.handler("parse_url")
+def _run_parse_url(payload: dict):
+    req = ParseUrlRequest(**payload)
+    return ParsedRecipe(**scrape_recipe_url(req.url)).model_dump()
+
+
+def get_control_db():
+    db = ControlSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.post("/jobs", response_model=JobOut, status_code=202)
+def create_job(data: JobCreate, db: Session = Depends(get_control_db)):
+    schema = JOB_PAYLOADS.get(data.kind)
+    if schema is None:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{data.kind}'")
+    try:
+        payload = schema(**data.payload).model_dump()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return jobqueue.enqueue(db, data.kind, payload)
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(job_id: str, db: Session = Depends(get_control_db)):
+    job = db.query(Job).filter(Job.id == job_id, Job.household == tenancy.current()).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _load_job(job_id: str) -> Optional[JobOut]:
+    db = ControlSession()
+    try:
+        job = db.query(Job).filter(Job.id == job_id, Job.household == tenancy.current()).first()
+        return JobOut.model_validate(job) if job else None
+    finally:
+        db.close()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-sent events: one event per status change, ending at done/failed."""
+    if await run_in_threadpool(_load_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            job = await run_in_threadpool(_load_job, job_id)
+            if job is None:
+                return
+            state = (job.status, job.attempts)
+            if state != last:
+                last = state
+                idle = 0.0
+                yield f"event: {job.status}\ndata: {job.model_dump_json()}\n\n"
+                if job.status in jobqueue.TERMINAL:
+                    return
+            elif idle >= _SSE_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(_SSE_POLL_SECONDS)
+            idle += _SSE_POLL_SECONDS
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
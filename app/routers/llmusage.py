@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import datetime, timedelta, timezone
+
+from ..database import get_db
+from ..models import LlmCall
+from ..schemas import LlmUsageSummary
+
+router = APIRouter()
+
+
+@router.get("/llm/usage", response_model=List[LlmUsageSummary])
+def llm_usage(
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+):
+    """Per-feature token spend and latency over the last `days` days."""
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    rows = (
+        db.query(
+            LlmCall.feature,
+            func.count(LlmCall.id),
+            func.sum(case((LlmCall.outcome == "error", 1), else_=0)),
+            func.sum(LlmCall.input_tokens),
+            func.sum(LlmCall.output_tokens),
+            func.sum(LlmCall.cache_read_tokens),
+            func.sum(LlmCall.cache_creation_tokens),
+            func.avg(LlmCall.latency_ms),
+            func.max(LlmCall.latency_ms),
+        )
+        .filter(LlmCall.created_at >= since)
+        .group_by(LlmCall.feature)
+        .order_by(LlmCall.feature)
+        .all()
+    )
+    return [
+        LlmUsageSummary(
+            feature=feature,
+            calls=calls,
+            errors=errors or 0,
+            input_tokens=input_tokens or 0,
+            output_tokens=output_tokens or 0,
+            cache_read_tokens=cache_read or 0,
+            cache_creation_tokens=cache_creation or 0,
+            avg_latency_ms=round(avg_latency or 0, 1),
+            max_latency_ms=max_latency or 0,
+        )
+        for feature, calls, errors, input_tokens, output_tokens, cache_read, cache_creation, avg_latency, max_latency in rows
+    ]
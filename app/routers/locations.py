@@ -3,16 +3,18 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 
+from .. import dimensions
 from ..database import get_db
-from ..models import Location, Item
+from ..models import Location
 from ..schemas import LocationOut, LocationCreate, LocationUpdate
+from ..services.stats_service import item_count
 
 router = APIRouter()
 
 
 @router.get("/locations", response_model=List[LocationOut])
 def list_locations(db: Session = Depends(get_db)):
-    return db.query(Location).order_by(Location.sort_order).all()
+    return list(dimensions.get(db).locations.values())
 
 
 @router.post("/locations", response_model=LocationOut, status_code=201)
@@ -23,6 +25,7 @@ def create_location(data: LocationCreate, db: Session = Depends(get_db)):
     loc = Location(name=data.name, sort_order=max_order + 1)
     db.add(loc)
     db.commit()
+    dimensions.invalidate()
     db.refresh(loc)
     return loc
 
@@ -39,6 +42,7 @@ def update_location(location_id: int, data: LocationUpdate, db: Session = Depend
         raise HTTPException(status_code=409, detail="Location name already in use")
     loc.name = data.name
     db.commit()
+    dimensions.invalidate()
     db.refresh(loc)
     return loc
 
@@ -48,7 +52,7 @@ def delete_location(location_id: int, db: Session = Depends(get_db)):
     loc = db.query(Location).filter(Location.id == location_id).first()
     if not loc:
         raise HTTPException(status_code=404, detail="Location not found")
-    count = db.query(Item).filter(Item.location_id == location_id).count()
+    count = item_count(db, "location", location_id)
     if count:
         raise HTTPException(
             status_code=409,
@@ -56,3 +60,4 @@ def delete_location(location_id: int, db: Session = Depends(get_db)):
         )
     db.delete(loc)
     db.commit()
+    dimensions.invalidate()
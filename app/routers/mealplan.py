@@ -1,19 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import case
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, timedelta
 
 from ..database import get_db
-from ..models import MealPlanEntry
-from ..schemas import MealPlanEntryCreate, MealPlanEntryUpdate, MealPlanEntryOut
+from ..idempotency import IdempotentRoute
+from ..models import MealPlanEntry, MealPlanTemplate
+from ..schemas import (
+    MealPlanEntryCreate, MealPlanEntryUpdate, MealPlanEntryOut, MealPlanBulkUpsert,
+    MealPlanTemplateCreate, MealPlanTemplateOut,
+)
+from ..services import mealplan_service
 
-router = APIRouter()
-
-
-def _week_monday(d: date) -> date:
-    """Return the Monday of the week containing d."""
-    return d - timedelta(days=d.weekday())
+router = APIRouter(route_class=IdempotentRoute)
 
 
 @router.get("/mealplan", response_model=List[MealPlanEntryOut])
@@ -29,20 +28,79 @@ def list_meal_plan(
     else:
         anchor = date.today()
 
-    monday = _week_monday(anchor)
-    sunday = monday + timedelta(days=6)
-
-    meal_order = case(
-        (MealPlanEntry.meal_type == "breakfast", 1),
-        (MealPlanEntry.meal_type == "lunch", 2),
-        (MealPlanEntry.meal_type == "dinner", 3),
-    )
-    return (
-        db.query(MealPlanEntry)
-        .filter(MealPlanEntry.date >= monday, MealPlanEntry.date <= sunday)
-        .order_by(MealPlanEntry.date, meal_order)
-        .all()
-    )
+    monday = mealplan_service.week_monday(anchor)
+    return mealplan_service.list_range(db, monday, monday + timedelta(days=6))
+
+
+@router.get("/mealplan/range", response_model=List[MealPlanEntryOut])
+def list_meal_plan_range(start: date, end: date, db: Session = Depends(get_db)):
+    """Entries from start to end inclusive, up to about six months."""
+    try:
+        return mealplan_service.list_range(db, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/mealplan/bulk", response_model=List[MealPlanEntryOut])
+def bulk_upsert_meal_plan(
+    payload: MealPlanBulkUpsert,
+    overwrite: bool = Query(True, description="Replace slots that are already planned"),
+    db: Session = Depends(get_db),
+):
+    """Create or replace many slots in one transaction."""
+    entries = mealplan_service.upsert_entries(db, (e.model_dump() for e in payload.entries), overwrite)
+    # Serialize before commit expires the rows, which would reload each one
+    out = [MealPlanEntryOut.model_validate(e) for e in entries]
+    db.commit()
+    return out
+
+
+@router.get("/mealplan/templates", response_model=List[MealPlanTemplateOut])
+def list_templates(db: Session = Depends(get_db)):
+    return db.query(MealPlanTemplate).order_by(MealPlanTemplate.name).all()
+
+
+@router.post("/mealplan/templates", response_model=MealPlanTemplateOut, status_code=201)
+def create_template(data: MealPlanTemplateCreate, db: Session = Depends(get_db)):
+    """Save a week template from explicit entries, or copy the week containing from_week."""
+    try:
+        template = mealplan_service.create_template(
+            db, data.name, [e.model_dump() for e in data.entries], data.from_week
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+@router.post("/mealplan/templates/{template_id}/apply", response_model=List[MealPlanEntryOut])
+def apply_template(
+    template_id: int,
+    week: date = Query(..., description="Any day of the target week"),
+    overwrite: bool = Query(True, description="Replace slots that are already planned"),
+    db: Session = Depends(get_db),
+):
+    """Stamp a template onto a week in one upsert."""
+    template = db.query(MealPlanTemplate).filter(MealPlanTemplate.id == template_id).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    try:
+        entries = mealplan_service.apply_template(db, template, week, overwrite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    out = [MealPlanEntryOut.model_validate(e) for e in entries]
+    db.commit()
+    return out
+
+
+@router.delete("/mealplan/templates/{template_id}", status_code=204)
+def delete_template(template_id: int, db: Session = Depends(get_db)):
+    template = db.query(MealPlanTemplate).filter(MealPlanTemplate.id == template_id).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    db.delete(template)
+    db.commit()
 
 
 @router.post("/mealplan", response_model=MealPlanEntryOut, status_code=201)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from typing import List
+
+from .. import dimensions, limiter, profiling, querystats
+from ..config import settings
+from ..database import open_households
+from ..services import autocomplete_service
+
+router = APIRouter()
+
+
+@router.get("/metrics/limiters", response_model=List[dict])
+def limiter_metrics():
+    """Queue depth and counters for each rate-limited AI feature."""
+    return [lim.stats() for lim in limiter.ALL]
+
+
+@router.get("/metrics/households")
+def household_metrics():
+    """Household databases open in this process, least recently used first."""
+    return {
+        "enabled": settings.households_enabled,
+        "open": open_households(),
+        "max_open": settings.household_max_open,
+    }
+
+
+@router.get("/metrics/autocomplete")
+def autocomplete_metrics():
+    """Size of each household's in-memory autocomplete index."""
+    return autocomplete_service.stats()
+
+
+@router.get("/metrics/dimensions")
+def dimension_metrics():
+    """Cached dimension snapshot version and age per household."""
+    return dimensions.stats()
+
+
+@router.get("/metrics/queries", response_model=List[dict])
+def query_metrics():
+    """SQL queries per route since start, with likely N+1 patterns."""
+    return querystats.route_stats()
+
+
+@router.get("/metrics/profiles", response_model=List[dict])
+def list_profiles(limit: int = 50):
+    """Recent request profiles, newest first (see app/profiling.py)."""
+    return profiling.list_profiles(limit)
+
+
+@router.get("/metrics/profiles/{name}")
+def get_profile(name: str):
+    """Collapsed stacks of one profile, for flamegraph.pl or speedscope."""
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{name}.folded")
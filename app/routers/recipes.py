@@ -1,39 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import Optional
+import hashlib
 import json
 
+from .. import dimensions, limiter
 from ..database import get_db
-from ..models import Item, SavedRecipe, RecipeTag
+from ..fieldsets import FieldSet, json_list
+from ..models import Item, RecipeIngredient, SavedRecipe, normalize_name
 from ..schemas import (
     RecipeRequest, ParseUrlRequest, ParseHtmlRequest, ParsedRecipe,
     SavedRecipeCreate, SavedRecipeUpdate, SavedRecipeOut, RecipeTagOut
 )
 from ..services.recipe_service import get_recipe_suggestions
 from ..services.scrape_service import scrape_recipe_url, parse_recipe_html
+from ..services.image_service import DEFAULT_WIDTH, FORMATS, ensure_thumbnails, get_thumbnail, snap_width
 
 router = APIRouter()
 
+# ?fields= on GET /recipes/saved, e.g. fields=title,thumbnail_url for a title list
+SAVED_RECIPE_FIELDS = FieldSet(
+    SavedRecipe, SavedRecipeOut,
+    derived={"thumbnail_url": (("id", "image_url"), None)},
+    decoders={"ingredients": json_list, "instructions": json_list, "tags": json_list},
+)
+
 
 @router.post("/recipes/suggest")
-def suggest_recipes(request: RecipeRequest, db: Session = Depends(get_db)):
-    items = db.query(Item).filter(Item.quantity > 0).all()
+async def suggest_recipes(request: RecipeRequest, db: Session = Depends(get_db)):
+    items = await run_in_threadpool(lambda: dimensions.hydrate(db, db.query(Item).filter(Item.quantity > 0).all()))
     if not items:
         raise HTTPException(status_code=400, detail="No items in inventory to suggest recipes from.")
     try:
-        recipes = get_recipe_suggestions(items, request.dietary_notes)
+        # Same notes over a different inventory is a different request
+        names = "\n".join(sorted(normalize_name(i.name) for i in items))
+        key = (request.dietary_notes.strip().lower(), hashlib.sha1(names.encode("utf-8")).hexdigest())
+        recipes = await limiter.recipe_suggest.run(key, get_recipe_suggestions, items, request.dietary_notes)
         return {"recipes": recipes}
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
 
 
 @router.post("/recipes/parse-url", response_model=ParsedRecipe)
-def parse_url(request: ParseUrlRequest):
+async def parse_url(request: ParseUrlRequest):
     try:
-        result = scrape_recipe_url(request.url)
+        result = await limiter.parse_url.run(request.url.strip(), scrape_recipe_url, request.url)
         return ParsedRecipe(**result)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse recipe: {e}")
 
@@ -51,26 +69,41 @@ def parse_html(request: ParseHtmlRequest):
 
 @router.get("/recipes/tags", response_model=list[RecipeTagOut])
 def list_tags(db: Session = Depends(get_db)):
-    return db.query(RecipeTag).order_by(RecipeTag.sort_order).all()
+    return dimensions.get(db).tags
 
 
 @router.get("/recipes/saved", response_model=list[SavedRecipeOut])
 def list_saved(
     favorite: Optional[bool] = None,
     tag: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="comma-separated SavedRecipeOut fields to return; id is always included"),
     db: Session = Depends(get_db)
 ):
+    try:
+        names = SAVED_RECIPE_FIELDS.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     q = db.query(SavedRecipe)
     if favorite is not None:
         q = q.filter(SavedRecipe.is_favorite == favorite)
-    recipes = q.order_by(SavedRecipe.created_at.desc()).all()
+    q = q.order_by(SavedRecipe.created_at.desc())
+    if names:
+        rows = SAVED_RECIPE_FIELDS.select(q, names, extra=("tags",) if tag else ()).all()
+        if tag:
+            rows = [r for r in rows if tag in json.loads(r.tags or "[]")]
+        return SAVED_RECIPE_FIELDS.response(rows, names)
+    recipes = q.all()
     if tag:
         recipes = [r for r in recipes if tag in json.loads(r.tags or "[]")]
     return recipes
 
 
 @router.post("/recipes/saved", response_model=SavedRecipeOut, status_code=201)
-def save_recipe(recipe: SavedRecipeCreate, db: Session = Depends(get_db)):
+def save_recipe(
+    recipe: SavedRecipeCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     db_recipe = SavedRecipe(
         title=recipe.title,
         url=recipe.url,
@@ -87,6 +120,9 @@ def save_recipe(recipe: SavedRecipeCreate, db: Session = Depends(get_db)):
     db.add(db_recipe)
     db.commit()
     db.refresh(db_recipe)
+    if db_recipe.image_url:
+        # Warm the thumbnail cache so the first list render doesn't wait on the origin
+        background_tasks.add_task(ensure_thumbnails, db_recipe.image_url)
     return db_recipe
 
 
@@ -98,6 +134,32 @@ def get_saved(recipe_id: int, db: Session = Depends(get_db)):
     return recipe
 
 
+@router.get("/recipes/saved/{recipe_id}/image")
+def get_saved_image(
+    recipe_id: int,
+    request: Request,
+    w: int = Query(DEFAULT_WIDTH),
+    db: Session = Depends(get_db),
+):
+    recipe = db.query(SavedRecipe).filter(SavedRecipe.id == recipe_id).first()
+    if not recipe or not recipe.image_url:
+        raise HTTPException(status_code=404, detail="Recipe image not found")
+
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    path = get_thumbnail(recipe.image_url, snap_width(w), fmt)
+    if not path:
+        raise HTTPException(status_code=502, detail="Could not fetch recipe image")
+
+    return FileResponse(
+        path,
+        media_type=FORMATS[fmt],
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Vary": "Accept",
+        },
+    )
+
+
 @router.put("/recipes/saved/{recipe_id}", response_model=SavedRecipeOut)
 def update_saved(recipe_id: int, update: SavedRecipeUpdate, db: Session = Depends(get_db)):
     recipe = db.query(SavedRecipe).filter(SavedRecipe.id == recipe_id).first()
@@ -121,6 +183,8 @@ def delete_saved(recipe_id: int, db: Session = Depends(get_db)):
     recipe = db.query(SavedRecipe).filter(SavedRecipe.id == recipe_id).first()
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    # SQLite foreign keys are off, so drop the parse cache explicitly
+    db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id == recipe_id).delete(synchronize_session=False)
     db.delete(recipe)
     db.commit()
     return None
@@ -1,27 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date, timedelta
 
 from ..database import get_db
-from ..models import ShoppingListItem, Item
-from ..schemas import ShoppingItemCreate, ShoppingItemUpdate, ShoppingItemOut
+from ..fieldsets import FieldSet
+from ..idempotency import IdempotentRoute
+from ..models import ShoppingListItem, Item, normalize_name
+from ..schemas import ShoppingItemCreate, ShoppingItemUpdate, ShoppingItemOut, MealPlanShoppingOut
+from ..services import mealplan_service
+from ..services.shopping_service import add_or_merge, from_meal_plan
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
+
+SHOPPING_FIELDS = FieldSet(ShoppingListItem, ShoppingItemOut)
 
 
 @router.get("/shopping", response_model=List[ShoppingItemOut])
-def list_shopping(db: Session = Depends(get_db)):
-    return (
-        db.query(ShoppingListItem)
-        .order_by(ShoppingListItem.is_checked, ShoppingListItem.created_at)
-        .all()
-    )
+def list_shopping(
+    fields: Optional[str] = Query(None, description="comma-separated ShoppingItemOut fields to return; id is always included"),
+    db: Session = Depends(get_db),
+):
+    try:
+        names = SHOPPING_FIELDS.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = db.query(ShoppingListItem).order_by(ShoppingListItem.is_checked, ShoppingListItem.created_at)
+    if names:
+        return SHOPPING_FIELDS.response(SHOPPING_FIELDS.select(query, names), names)
+    return query.all()
 
 
 @router.post("/shopping", response_model=ShoppingItemOut, status_code=201)
-def add_shopping_item(item: ShoppingItemCreate, db: Session = Depends(get_db)):
-    db_item = ShoppingListItem(**item.model_dump())
-    db.add(db_item)
+def add_shopping_item(
+    item: ShoppingItemCreate,
+    merge: bool = Query(False, description="add to an open row for the same item if units convert"),
+    db: Session = Depends(get_db),
+):
+    if merge:
+        db_item, _ = add_or_merge(db, **item.model_dump())
+    else:
+        db_item = ShoppingListItem(**item.model_dump())
+        db.add(db_item)
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -33,16 +53,14 @@ def auto_suggest(db: Session = Depends(get_db)):
     low_items = db.query(Item).filter(Item.quantity <= Item.low_threshold).all()
 
     added = []
+    # Any open row for the same name covers the item, whatever its unit
+    listed = {
+        normalize_name(name)
+        for name, in db.query(ShoppingListItem.name).filter(ShoppingListItem.is_checked == False)
+    }
     for item in low_items:
-        existing = (
-            db.query(ShoppingListItem)
-            .filter(
-                ShoppingListItem.name == item.name,
-                ShoppingListItem.is_checked == False,
-            )
-            .first()
-        )
-        if not existing:
+        key = normalize_name(item.name)
+        if key not in listed:
             shopping_item = ShoppingListItem(
                 name=item.name,
                 quantity=max(item.low_threshold, 1.0),
@@ -52,12 +70,35 @@ def auto_suggest(db: Session = Depends(get_db)):
             )
             db.add(shopping_item)
             added.append(shopping_item)
+            listed.add(key)
 
+    db.flush()
+    ids = [item.id for item in added]  # read before commit expires them
     db.commit()
-    for item in added:
-        db.refresh(item)
-
-    return added
+    if not ids:
+        return []
+    # One query to reload the new rows instead of a refresh per row
+    return db.query(ShoppingListItem).filter(ShoppingListItem.id.in_(ids)).order_by(ShoppingListItem.id).all()
+
+
+@router.post("/shopping/from-mealplan", response_model=MealPlanShoppingOut)
+def generate_from_meal_plan(
+    start: Optional[date] = Query(None, description="defaults to this week's Monday"),
+    end: Optional[date] = Query(None, description="defaults to six days after start"),
+    dry_run: bool = Query(False, description="report what is needed without adding it"),
+    db: Session = Depends(get_db),
+):
+    """Add the ingredients planned meals need beyond current stock and the open list."""
+    start = start or mealplan_service.week_monday(date.today())
+    end = end or start + timedelta(days=6)
+    try:
+        result = from_meal_plan(db, start, end, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Serialize before commit expires the new rows
+    out = MealPlanShoppingOut.model_validate(result)
+    db.commit()
+    return out
 
 
 @router.get("/shopping/export")
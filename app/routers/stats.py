@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas import StatsOut
+from ..services.stats_service import get_stats
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=StatsOut)
+def stats(db: Session = Depends(get_db)):
+    """Inventory counts per location and category, from the maintained rollups."""
+    return get_stats(db)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas import SyncOut
+from ..services.sync_service import changes_since
+
+router = APIRouter()
+
+
+@router.get("/sync", response_model=SyncOut)
+def sync(
+    since: int = Query(0, ge=0, description="seq from the previous sync response; 0 for everything"),
+    db: Session = Depends(get_db),
+):
+    return changes_since(db, since)
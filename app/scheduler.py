@@ -0,0 +1,130 @@
+"""
+Periodic background tasks.
+
+Modules register work with @every(seconds). The app lifespan starts one
+daemon thread that runs each task when it is due. A task that raises is
+logged and runs again at its next interval. Long tasks delay the others,
+so keep them short or let them hand off to their own thread.
+
+With several worker processes (run.py --prod) every worker starts the
+thread. Tasks that work on the databases (digest, backups, compaction) are
+leader-only: only the worker holding an exclusive lock on
+SCHEDULER_LOCK_PATH runs them, so they run once. The others retry the lock
+every few seconds and take over if the holder exits. A new holder starts
+those tasks' intervals afresh. Tasks that tidy the process's own memory
+(idle engines, autocomplete indexes) pass leader_only=False and run in
+every worker.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, List
+
+from .config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no --prod workers, a single process runs the tasks
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_TICK_SECONDS = 1.0
+_LEADER_RETRY_SECONDS = 5.0
+
+_tasks: List[dict] = []
+_stop = threading.Event()
+_thread = None
+_lock_file = None
+
+
+def every(seconds: float, run_at_start: bool = False, leader_only: bool = True):
+    """Register fn to run every `seconds`; optionally also right after startup.
+
+    leader_only=False runs it in every worker process, for per-process state.
+    """
+    def decorator(fn: Callable[[], None]):
+        _tasks.append({
+            "name": f"{fn.__module__}.{fn.__name__}",
+            "interval": seconds,
+            "fn": fn,
+            "next_run": 0.0 if run_at_start else None,
+            "leader_only": leader_only,
+        })
+        return fn
+    return decorator
+
+
+def start() -> None:
+    global _thread
+    if _thread is not None:
+        return
+    now = time.monotonic()
+    for task in _tasks:
+        if task["next_run"] != 0.0:
+            task["next_run"] = now + task["interval"]
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="scheduler", daemon=True)
+    _thread.start()
+    logger.info("Scheduler started with %d task(s)", len(_tasks))
+
+
+def stop() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+    _release()
+
+
+def _acquire() -> bool:
+    """Take the scheduler lock without blocking; True if this process now runs the tasks."""
+    global _lock_file
+    if fcntl is None or _lock_file is not None:
+        return True
+    os.makedirs(os.path.dirname(settings.scheduler_lock_path) or ".", exist_ok=True)
+    f = open(settings.scheduler_lock_path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _lock_file = f
+    return True
+
+
+def _release() -> None:
+    global _lock_file
+    if _lock_file is not None:
+        _lock_file.close()  # closing drops the flock
+        _lock_file = None
+
+
+def _loop() -> None:
+    leader = False
+    waited = False
+    next_attempt = 0.0
+    while not _stop.is_set():
+        now = time.monotonic()
+        if not leader and now >= next_attempt:
+            leader = _acquire()
+            if not leader:
+                waited = True
+                next_attempt = now + _LEADER_RETRY_SECONDS
+            elif waited:
+                # Took over from another worker, which ran everything due until it exited
+                logger.info("Scheduler lock acquired; running leader-only tasks in this worker")
+                for task in _tasks:
+                    if task["leader_only"]:
+                        task["next_run"] = now + task["interval"]
+        for task in _tasks:
+            if (task["leader_only"] and not leader) or now < task["next_run"]:
+                continue
+            task["next_run"] = now + task["interval"]
+            try:
+                task["fn"]()
+            except Exception:
+                logger.exception("Scheduled task %s failed", task["name"])
+        _stop.wait(_TICK_SECONDS)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, computed_field, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, computed_field, field_validator
+from typing import Any, Optional, List
 from datetime import date, datetime
 
+from .services.image_service import cache_key as image_cache_key
+
 
 class CategoryOut(BaseModel):
     id: int
@@ -40,6 +42,8 @@ class ItemUpdate(ItemBase):
 
 class ItemOut(ItemBase):
     id: int
+    base_quantity: Optional[float] = None  # quantity in base_unit (g / ml / each)
+    base_unit: Optional[str] = None
     category: Optional[CategoryOut] = None
     location: Optional[LocationOut] = None
     created_at: Optional[datetime] = None
@@ -115,19 +119,42 @@ class ShoppingItemUpdate(BaseModel):
 
 class ShoppingItemOut(ShoppingItemBase):
     id: int
+    base_quantity: Optional[float] = None
+    base_unit: Optional[str] = None
     is_checked: bool = False
     created_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
 
+class MealPlanNeed(BaseModel):
+    name: str
+    quantity: float
+    unit: str = ""
+
+
+class MealPlanShoppingOut(BaseModel):
+    start: date
+    end: date
+    recipes: int  # distinct saved recipes in the range
+    unmatched_meals: List[str] = []  # planned meals with no saved recipe
+    needed: List[MealPlanNeed] = []  # deficits beyond stock and the open list
+    covered: List[str] = []  # ingredients already in stock or listed
+    unknown: List[str] = []  # stocked or listed only in units that don't convert; check by hand
+    added: List[ShoppingItemOut] = []  # rows inserted (empty on dry_run)
+
+
 class RecipeRequest(BaseModel):
     dietary_notes: str = ""
 
 
+MEAL_TYPES = ("breakfast", "lunch", "dinner")
+
+
 class MealPlanEntryBase(BaseModel):
     meal_name: str
     notes: str = ""
+    recipe_id: Optional[int] = None  # saved recipe; otherwise matched by title when generating shopping
 
 
 class MealPlanEntryCreate(MealPlanEntryBase):
@@ -137,7 +164,7 @@ class MealPlanEntryCreate(MealPlanEntryBase):
     @field_validator('meal_type')
     @classmethod
     def validate_meal_type(cls, v):
-        if v not in ("breakfast", "lunch", "dinner"):
+        if v not in MEAL_TYPES:
             raise ValueError('meal_type must be breakfast, lunch, or dinner')
         return v
 
@@ -145,6 +172,7 @@ class MealPlanEntryCreate(MealPlanEntryBase):
 class MealPlanEntryUpdate(BaseModel):
     meal_name: Optional[str] = None
     notes: Optional[str] = None
+    recipe_id: Optional[int] = None
 
 
 class MealPlanEntryOut(MealPlanEntryBase):
@@ -157,6 +185,45 @@ class MealPlanEntryOut(MealPlanEntryBase):
     model_config = {"from_attributes": True}
 
 
+class MealPlanBulkUpsert(BaseModel):
+    entries: List[MealPlanEntryCreate] = Field(..., max_length=500)
+
+
+class MealPlanTemplateEntry(MealPlanEntryBase):
+    weekday: int = Field(..., ge=0, le=6)  # 0 = Monday
+    meal_type: str = "dinner"
+
+    @field_validator('meal_type')
+    @classmethod
+    def validate_meal_type(cls, v):
+        if v not in MEAL_TYPES:
+            raise ValueError('meal_type must be breakfast, lunch, or dinner')
+        return v
+
+
+class MealPlanTemplateCreate(BaseModel):
+    name: str
+    entries: List[MealPlanTemplateEntry] = []
+    from_week: Optional[date] = None  # any day of a planned week to copy instead of entries
+
+
+class MealPlanTemplateOut(BaseModel):
+    id: int
+    name: str
+    entries: List[MealPlanTemplateEntry] = []
+    created_at: Optional[datetime] = None
+
+    @field_validator('entries', mode='before')
+    @classmethod
+    def parse_json_entries(cls, v):
+        if isinstance(v, str):
+            import json
+            return json.loads(v)
+        return v or []
+
+    model_config = {"from_attributes": True}
+
+
 class AppSettingUpdate(BaseModel):
     value: str
 
@@ -242,6 +309,14 @@ class SavedRecipeOut(BaseModel):
             return json.loads(v)
         return v or []
 
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        if not self.image_url:
+            return None
+        # v= changes whenever image_url does, so the response can be cached as immutable
+        return f"/api/recipes/saved/{self.id}/image?v={image_cache_key(self.image_url)}"
+
     model_config = {"from_attributes": True}
 
 
@@ -252,3 +327,185 @@ class RecipeTagOut(BaseModel):
     sort_order: int
 
     model_config = {"from_attributes": True}
+
+
+class LlmUsageSummary(BaseModel):
+    feature: str
+    calls: int
+    errors: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    avg_latency_ms: float
+    max_latency_ms: int
+
+
+class JobCreate(BaseModel):
+    kind: str  # "recipe_suggest" | "parse_list" | "parse_url"
+    payload: dict = {}
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int = 0
+    error: str = ""
+    result: Optional[Any] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator('result', mode='before')
+    @classmethod
+    def parse_json_result(cls, v):
+        if isinstance(v, str):
+            import json
+            return json.loads(v)
+        return v
+
+    model_config = {"from_attributes": True}
+
+
+class SyncChanges(BaseModel):
+    items: List[ItemOut] = []
+    shopping_list: List[ShoppingItemOut] = []
+    meal_plan_entries: List[MealPlanEntryOut] = []
+    saved_recipes: List[SavedRecipeOut] = []
+
+
+class SyncDeleted(BaseModel):
+    items: List[int] = []
+    shopping_list: List[int] = []
+    meal_plan_entries: List[int] = []
+    saved_recipes: List[int] = []
+
+
+class SyncOut(BaseModel):
+    seq: int  # pass back as ?since= next time
+    full_resync: bool = False  # true: `changes` is the complete state; drop anything local
+    changes: SyncChanges
+    deleted: SyncDeleted
+
+
+class ImportRowError(BaseModel):
+    row: int  # line number in the uploaded file
+    error: str
+
+
+class ItemImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []  # first 100 only
+
+
+class DigestItem(BaseModel):
+    id: int
+    name: str
+    quantity: float
+    unit: str = ""
+    expiration_date: Optional[date] = None
+
+
+class DigestLocation(BaseModel):
+    location_id: Optional[int] = None
+    location: str  # "Unassigned" when the item has no location
+    items: List[DigestItem]
+
+
+class ItemDigestOut(BaseModel):
+    computed_at: datetime
+    expiring_days: int
+    expired: List[DigestLocation] = []
+    expiring: List[DigestLocation] = []
+    low: List[DigestLocation] = []
+    counts: dict  # {"expired": n, "expiring": n, "low": n}
+
+
+class ItemGroupEntry(BaseModel):
+    id: int
+    location_id: Optional[int] = None
+    location: Optional[str] = None
+    quantity: float
+    expiration_date: Optional[date] = None
+    is_low: bool
+
+
+class ItemGroupOut(BaseModel):
+    normalized_name: str
+    name: str
+    unit: str = ""
+    category_id: Optional[int] = None
+    total_quantity: float
+    item_count: int
+    location_count: int
+    soonest_expiration: Optional[date] = None
+    any_low: bool
+    total_base_quantity: Optional[float] = None  # None when units mix dimensions (e.g. g and cans)
+    base_unit: Optional[str] = None
+    entries: List[ItemGroupEntry]
+
+    @computed_field
+    @property
+    def any_expired(self) -> bool:
+        return any(e.expiration_date and e.expiration_date < date.today() for e in self.entries)
+
+    @computed_field
+    @property
+    def any_expiring_soon(self) -> bool:
+        return any(
+            e.expiration_date and 0 <= (e.expiration_date - date.today()).days <= 7
+            for e in self.entries
+        )
+
+
+class AutocompleteOut(BaseModel):
+    name: str
+    unit: str = ""
+    category_id: Optional[int] = None
+    score: float
+
+
+class StatsCounts(BaseModel):
+    items: int
+    low: int
+    expired: int
+    expiring: int  # within 7 days
+
+
+class StatsBucket(StatsCounts):
+    id: Optional[int] = None  # None for items with no location / category
+    name: str
+
+
+class StatsOut(BaseModel):
+    totals: StatsCounts
+    locations: List[StatsBucket]
+    categories: List[StatsBucket]
+    empty_locations: List[int]
+
+
+class HistoryEntryOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    op: str  # create / update / delete / day (several changes compacted into one)
+    changes: dict  # {field: [old, new]}
+    actor: str = ""
+    created_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+    @field_validator("changes", mode="before")
+    @classmethod
+    def parse_changes(cls, v):
+        if isinstance(v, str):
+            import json
+            return json.loads(v)
+        return v
+
+
+class HistoryPage(BaseModel):
+    entries: List[HistoryEntryOut]
+    next_before: Optional[int] = None  # pass as ?before= for the next (older) page
@@ -1,3 +1,5 @@
+from sqlalchemy.orm import Session
+
 from .database import SessionLocal
 from .models import Category, Location, RecipeTag
 
@@ -35,8 +37,8 @@ RECIPE_TAGS = [
 ]
 
 
-def seed_data():
-    db = SessionLocal()
+def seed_data(engine=None):
+    db = Session(bind=engine) if engine else SessionLocal()
     try:
         if db.query(Category).count() == 0:
             for name, order in CATEGORIES:
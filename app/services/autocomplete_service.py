@@ -0,0 +1,220 @@
+"""
+In-memory prefix index for name autocomplete.
+
+The index holds every name seen in items, the shopping list and saved
+recipe ingredients, one index per household. Terms sit in a sorted list,
+and a lookup is a bisect to the prefix plus a short scan. Every word start
+is indexed, so "ched" finds "sharp cheddar". Results are ranked by how
+often a name has been touched (weight) and how recently.
+
+The index stays current through the delta-sync change sequence. At most
+once per REFRESH_SECONDS, a lookup compares sync_state.seq with the last
+seq it saw and folds in only the rows changed since. That covers writes
+from every process and every code path. Memory is bounded: past
+settings.autocomplete_max_terms the lowest-ranked terms are dropped.
+"""
+import bisect
+import heapq
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import scheduler, tenancy
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Item, ShoppingListItem, SavedRecipe, SyncState, normalize_name
+from .ingredient_service import parse_ingredient
+
+REFRESH_SECONDS = 1.0
+_MAX_SCAN = 1000  # prefix matches examined per lookup; keeps 1-letter queries fast
+_RECENCY_HALF_LIFE_DAYS = 30.0
+
+
+def ingredient_name(line: str) -> str:
+    """Best-effort item name from a recipe ingredient line."""
+    return parse_ingredient(line).name
+
+
+class _Term:
+    __slots__ = ("name", "unit", "category_id", "weight", "last_seen", "_score", "_scored_at")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.unit = ""
+        self.category_id = None
+        self.weight = 0
+        self.last_seen = 0.0
+        self._scored_at = None
+
+    def score(self, now: float) -> float:
+        # Recency decays over days, so an hourly-cached score is exact enough
+        hour = int(now // 3600)
+        if self._scored_at != hour:
+            age_days = max(0.0, now - self.last_seen) / 86400
+            self._score = self.weight * 0.5 ** (age_days / _RECENCY_HALF_LIFE_DAYS)
+            self._scored_at = hour
+        return self._score
+
+
+class PrefixIndex:
+    def __init__(self, max_terms: int):
+        self.max_terms = max_terms
+        self.terms = {}  # normalized name -> _Term
+        self.keys = []  # sorted (word-start suffix, normalized name)
+        self.seq = 0
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, name: str, seen: Optional[datetime], unit: str = "", category_id=None) -> None:
+        key = normalize_name(name)
+        if len(key) < 2:
+            return
+        term = self.terms.get(key)
+        if term is None:
+            term = self.terms[key] = _Term(name.strip())
+            for start in _word_starts(key):
+                bisect.insort(self.keys, (key[start:], key))
+        term.weight += 1
+        term._scored_at = None
+        term.last_seen = max(term.last_seen, seen.timestamp() if seen else time.time())
+        if unit:
+            term.unit = unit
+        if category_id:
+            term.category_id = category_id
+
+    def prune(self) -> None:
+        """Drop the lowest-ranked terms until the index fits max_terms."""
+        if len(self.terms) <= self.max_terms:
+            return
+        now = time.time()
+        keep = set(heapq.nlargest(self.max_terms, self.terms, key=lambda k: self.terms[k].score(now)))
+        self.terms = {k: t for k, t in self.terms.items() if k in keep}
+        self.keys = [entry for entry in self.keys if entry[1] in keep]
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        q = normalize_name(query)
+        if not q:
+            return []
+        now = time.time()
+        start = bisect.bisect_left(self.keys, (q,))
+        end = bisect.bisect_left(self.keys, (q + "\uffff",), start, min(len(self.keys), start + _MAX_SCAN))
+        matches = {key for _, key in self.keys[start:end]}
+
+        def rank(key):
+            # Whole-name prefix matches rank above mid-name word matches
+            return self.terms[key].score(now) * (2.0 if key.startswith(q) else 1.0)
+
+        best = heapq.nlargest(limit, matches, key=rank)
+        return [
+            {
+                "name": self.terms[k].name,
+                "unit": self.terms[k].unit,
+                "category_id": self.terms[k].category_id,
+                "score": round(rank(k), 3),
+            }
+            for k in best
+        ]
+
+
+def _word_starts(key: str) -> Iterable[int]:
+    yield 0
+    for m in re.finditer(r"[\s\-/]+(?=\S)", key):
+        yield m.end()
+
+
+def _current_seq(db: Session) -> int:
+    return db.query(SyncState.seq).filter(SyncState.id == 1).scalar() or 0
+
+
+def _load(index: PrefixIndex, db: Session, since: int, upto: int) -> None:
+    """Fold rows changed in (since, upto] into the index."""
+    def changed(model):
+        return model.change_seq > since, model.change_seq <= upto
+
+    for name, unit, category_id, created, updated in db.query(
+        Item.name, Item.unit, Item.category_id, Item.created_at, Item.updated_at
+    ).filter(*changed(Item)):
+        index.add(name, updated or created, unit, category_id)
+
+    for name, unit, created in db.query(
+        ShoppingListItem.name, ShoppingListItem.unit, ShoppingListItem.created_at
+    ).filter(*changed(ShoppingListItem)):
+        index.add(name, created, unit)
+
+    for ingredients, created in db.query(SavedRecipe.ingredients, SavedRecipe.created_at).filter(*changed(SavedRecipe)):
+        try:
+            lines = json.loads(ingredients or "[]")
+        except ValueError:
+            continue
+        for line in lines:
+            if isinstance(line, str):
+                index.add(ingredient_name(line), created)
+
+    index.prune()
+
+
+_indexes: "OrderedDict[str, PrefixIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _index_for(household: str) -> PrefixIndex:
+    with _indexes_lock:
+        index = _indexes.get(household)
+        if index is None:
+            index = _indexes[household] = PrefixIndex(settings.autocomplete_max_terms)
+            while len(_indexes) > settings.household_max_open:
+                _indexes.popitem(last=False)
+        _indexes.move_to_end(household)
+        return index
+
+
+def refresh(db: Session, index: PrefixIndex) -> None:
+    now = time.monotonic()
+    if now - index.checked_at < REFRESH_SECONDS:
+        return
+    with index.lock:
+        if now - index.checked_at < REFRESH_SECONDS:
+            return
+        seq = _current_seq(db)
+        if seq != index.seq:
+            if seq < index.seq:
+                # Sequence went backwards (restored backup): rebuild from scratch
+                index.terms, index.keys, index.seq = {}, [], 0
+            _load(index, db, index.seq, seq)
+            index.seq = seq
+        index.checked_at = time.monotonic()
+
+
+def suggest(db: Session, query: str, limit: int = 8) -> List[dict]:
+    index = _index_for(tenancy.current())
+    refresh(db, index)
+    return index.search(query, limit)
+
+
+def stats() -> dict:
+    with _indexes_lock:
+        return {
+            household: {"terms": len(index.terms), "keys": len(index.keys), "seq": index.seq}
+            for household, index in _indexes.items()
+        }
+
+
+@scheduler.every(60, run_at_start=True, leader_only=False)
+def warm_indexes() -> None:
+    """Build the default index at startup and keep loaded ones current between lookups."""
+    with _indexes_lock:
+        households = list(_indexes) or [tenancy.DEFAULT_HOUSEHOLD]
+    for household in households:
+        with tenancy.use(household):
+            db = SessionLocal()
+            try:
+                refresh(db, _index_for(household))
+            finally:
+                db.close()
@@ -0,0 +1,124 @@
+"""
+Expiration and low-stock digest.
+
+A scheduled task scans each household's inventory once per interval: a
+range scan on the expiration_date index plus the partial low-stock
+index. It stores the result in item_digests. GET /api/items/digest serves
+the stored row, so requests never rescan. The digest is delivered to the
+notification sinks only when its contents change, not on every run.
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .. import scheduler, tenancy
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Item, Location, ItemDigest
+from ..schemas import ItemDigestOut
+from . import notify_service
+
+logger = logging.getLogger(__name__)
+
+_RETENTION = timedelta(days=7)
+_UNASSIGNED = "Unassigned"
+
+
+def _group(rows) -> list:
+    """[(item, location name)] -> [{location_id, location, items}] in location order."""
+    groups = OrderedDict()
+    for item, location_name in rows:
+        group = groups.setdefault(item.location_id, {
+            "location_id": item.location_id,
+            "location": location_name or _UNASSIGNED,
+            "items": [],
+        })
+        group["items"].append({
+            "id": item.id,
+            "name": item.name,
+            "quantity": item.quantity,
+            "unit": item.unit or "",
+            "expiration_date": item.expiration_date,
+        })
+    return list(groups.values())
+
+
+def compute(db: Session) -> dict:
+    today = date.today()
+    horizon = today + timedelta(days=settings.digest_expiring_days)
+
+    def scan(*criteria):
+        return (
+            db.query(Item, Location.name)
+            .outerjoin(Location, Item.location_id == Location.id)
+            .filter(*criteria)
+            .order_by(Location.sort_order, Location.name, Item.expiration_date, Item.name)
+            .all()
+        )
+
+    expiring_rows = scan(Item.expiration_date.isnot(None), Item.expiration_date <= horizon)
+    expired = [(i, loc) for i, loc in expiring_rows if i.expiration_date < today]
+    expiring = [(i, loc) for i, loc in expiring_rows if i.expiration_date >= today]
+    # Matches the partial index predicate exactly, so SQLite uses ix_items_low_stock
+    low = scan(Item.quantity <= Item.low_threshold)
+
+    return {
+        "computed_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "expiring_days": settings.digest_expiring_days,
+        "expired": _group(expired),
+        "expiring": _group(expiring),
+        "low": _group(low),
+        "counts": {"expired": len(expired), "expiring": len(expiring), "low": len(low)},
+    }
+
+
+def _fingerprint(digest: dict) -> str:
+    sections = {
+        key: sorted(item["id"] for group in digest[key] for item in group["items"])
+        for key in ("expired", "expiring", "low")
+    }
+    return hashlib.sha256(json.dumps(sections).encode()).hexdigest()[:16]
+
+
+def refresh(db: Session) -> ItemDigest:
+    """Compute and store a new digest, delivering it if anything changed."""
+    digest = ItemDigestOut(**compute(db))
+    fingerprint = _fingerprint(digest.model_dump())
+    previous = db.query(ItemDigest).order_by(ItemDigest.id.desc()).first()
+
+    row = ItemDigest(payload=digest.model_dump_json(), fingerprint=fingerprint)
+    db.add(row)
+    cutoff = digest.computed_at - _RETENTION
+    db.query(ItemDigest).filter(ItemDigest.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+
+    changed = previous is None or previous.fingerprint != fingerprint
+    if changed and any(digest.counts.values()):
+        payload = {"household": tenancy.current(), **digest.model_dump(mode="json")}
+        if notify_service.deliver("item_digest", payload):
+            row.delivered = True
+            db.commit()
+    return row
+
+
+def latest(db: Session) -> Optional[dict]:
+    row = db.query(ItemDigest).order_by(ItemDigest.id.desc()).first()
+    return json.loads(row.payload) if row else None
+
+
+def _refresh_current_household() -> None:
+    db = SessionLocal()
+    try:
+        refresh(db)
+    finally:
+        db.close()
+
+
+@scheduler.every(settings.digest_interval_minutes * 60, run_at_start=True)
+def refresh_all_households() -> None:
+    tenancy.for_each_household(_refresh_current_household)
@@ -0,0 +1,199 @@
+"""
+Recipe image thumbnail cache.
+
+Recipe sites link multi-megabyte hero images. Each original is fetched once,
+resized into a few WebP + JPEG variants on disk, and the original is thrown
+away. The cache directory is capped at settings.image_cache_max_mb; the
+least-recently-served files (by mtime) are evicted first.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from ..config import settings
+from ..lazy import require
+
+logger = logging.getLogger(__name__)
+
+THUMB_WIDTHS = (480, 960)
+DEFAULT_WIDTH = 480
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_MAX_SOURCE_BYTES = 20 * 1024 * 1024
+_FAILURE_RETRY_SECONDS = 3600
+_TOUCH_INTERVAL_SECONDS = 60
+_MAX_FAILURES = 1000
+
+_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+_locks: dict = {}  # cache key -> [lock, threads holding or waiting on it]
+_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+_failures: "OrderedDict[str, float]" = OrderedDict()  # cache key -> time of last failed fetch, oldest first
+
+
+def cache_key(url: str) -> str:
+    """Stable, filesystem-safe key for an image URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width to the nearest variant we actually store."""
+    return min(THUMB_WIDTHS, key=lambda w: abs(w - width))
+
+
+def _path(key: str, width: int, fmt: str) -> str:
+    return os.path.join(settings.image_cache_dir, key[:2], f"{key}-{width}.{fmt}")
+
+
+@contextmanager
+def _url_lock(key: str):
+    """Per-URL lock, dropped once no thread holds or waits on it."""
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _locks[key]
+
+
+def _recently_failed(key: str) -> bool:
+    with _locks_guard:
+        failed_at = _failures.get(key)
+        if failed_at is None:
+            return False
+        if time.time() - failed_at < _FAILURE_RETRY_SECONDS:
+            return True
+        del _failures[key]
+        return False
+
+
+def _record_failure(key: str) -> None:
+    with _locks_guard:
+        _failures[key] = time.time()
+        _failures.move_to_end(key)
+        while len(_failures) > _MAX_FAILURES:
+            _failures.popitem(last=False)
+
+
+def get_thumbnail(url: str, width: int, fmt: str) -> Optional[str]:
+    """Return the path of a cached thumbnail, fetching the original on a miss."""
+    path = _path(cache_key(url), width, fmt)
+    if not os.path.exists(path) and not ensure_thumbnails(url):
+        return None
+    _touch(path)
+    return path
+
+
+def ensure_thumbnails(url: str) -> bool:
+    """Fetch url once and write every thumbnail variant. Safe to call repeatedly."""
+    key = cache_key(url)
+    if _recently_failed(key):
+        return False
+
+    with _url_lock(key):
+        # Threads that waited on the lock see the first fetch's outcome
+        if all(os.path.exists(_path(key, w, f)) for w in THUMB_WIDTHS for f in FORMATS):
+            return True
+        if _recently_failed(key):
+            return False
+        try:
+            _write_variants(key, _fetch(url))
+        except Exception as e:
+            logger.warning("Could not cache recipe image %s: %s", url, e)
+            _record_failure(key)
+            return False
+        with _locks_guard:
+            _failures.pop(key, None)
+
+    _evict()
+    return True
+
+
+def _fetch(url: str) -> bytes:
+    requests = require("requests")
+    with requests.get(url, timeout=15, stream=True, headers={"User-Agent": _USER_AGENT}) as resp:
+        resp.raise_for_status()
+        buf = io.BytesIO()
+        for chunk in resp.iter_content(chunk_size=65536):
+            buf.write(chunk)
+            if buf.tell() > _MAX_SOURCE_BYTES:
+                raise ValueError("image is too large")
+    return buf.getvalue()
+
+
+def _write_variants(key: str, data: bytes) -> None:
+    require("PIL")
+    from PIL import Image, ImageOps
+
+    img = Image.open(io.BytesIO(data))
+    # Let the JPEG decoder downscale while decoding — much faster for huge originals
+    img.draft("RGB", (max(THUMB_WIDTHS), max(THUMB_WIDTHS)))
+    img = ImageOps.exif_transpose(img).convert("RGB")
+
+    os.makedirs(os.path.dirname(_path(key, DEFAULT_WIDTH, "jpeg")), exist_ok=True)
+    for width in THUMB_WIDTHS:
+        thumb = img
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            thumb = img.resize((width, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            path = _path(key, width, fmt)
+            tmp = f"{path}.tmp"
+            thumb.save(tmp, format=fmt.upper(), quality=80)
+            os.replace(tmp, path)
+
+
+def _touch(path: str) -> None:
+    """Mark a file as recently used so eviction keeps it."""
+    try:
+        if time.time() - os.path.getmtime(path) > _TOUCH_INTERVAL_SECONDS:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def _evict() -> None:
+    """Delete least-recently-used files until the cache fits its size cap."""
+    limit = settings.image_cache_max_mb * 1024 * 1024
+    with _evict_lock:
+        entries = []
+        total = 0
+        for root, _, files in os.walk(settings.image_cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= limit:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        logger.info("Image cache evicted down to %.1f MB", total / 1024 / 1024)
@@ -1,17 +1,13 @@
 import json
-import anthropic
 
 from ..config import settings
+from .llm_service import complete
 
 
 CATEGORIES = ["dairy", "produce", "meat", "frozen", "dry goods", "snacks", "beverages", "condiments", "leftovers", "other"]
 
-
-def parse_item_list(text: str) -> list:
-    if not settings.anthropic_api_key:
-        raise ValueError("ANTHROPIC_API_KEY is not configured.")
-
-    prompt = f"""Parse the following household inventory list into a JSON array.
+# Static instructions + examples — sent as a cached system block
+SYSTEM_PROMPT = f"""Parse the household inventory list the user sends into a JSON array.
 
 Available categories: {", ".join(CATEGORIES)}
 
@@ -29,20 +25,20 @@ Examples:
 "pasta" → {{"name": "Pasta", "quantity": 1, "unit": "box", "category": "dry goods"}}
 "olive oil 16oz" → {{"name": "Olive Oil", "quantity": 16, "unit": "oz", "category": "condiments"}}
 
-Return ONLY a valid JSON array with no markdown, no explanation.
+Return ONLY a valid JSON array with no markdown, no explanation."""
 
-List to parse:
-{text}"""
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-    message = client.messages.create(
-        model="claude-haiku-4-5-20251001",
+def parse_item_list(text: str) -> list:
+    if not settings.anthropic_api_key:
+        raise ValueError("ANTHROPIC_API_KEY is not configured.")
+
+    response_text = complete(
+        "parse_list",
+        SYSTEM_PROMPT,
+        f"List to parse:\n{text}",
         max_tokens=4096,
-        messages=[{"role": "user", "content": prompt}],
     )
 
-    response_text = message.content[0].text.strip()
-
     # Strip markdown fences if present
     if response_text.startswith("```"):
         lines = [l for l in response_text.split("\n") if not l.strip().startswith("```")]
@@ -0,0 +1,137 @@
+"""
+Recipe ingredient line parsing, cached per recipe.
+
+parse_ingredient() splits "1 1/2 cups flour, sifted" into a name, a
+quantity and a unit (see app/units.py). The parsed lines of each saved
+recipe are kept in recipe_ingredients, tagged with a hash of the recipe's
+ingredient list. Editing the recipe changes the hash, and the next read
+reparses it. Everything else is one indexed SELECT. A recipe with nothing
+to parse gets one EMPTY_POSITION row carrying the hash, so it isn't
+reparsed on every read.
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .. import units
+from ..models import RecipeIngredient, normalize_name
+
+_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅛": 0.125}
+# "2", "1.5", "1,5", "1/2", "1 1/2", "1½", "½", "2-3" (the larger end of a range)
+_QUANTITY = re.compile(
+    r"^(?:(\d+(?:[.,]\d+)?)\s*(?:-|to)\s*)?"
+    r"(\d+\s+\d+/\d+|\d+/\d+|\d*[½⅓⅔¼¾⅛]|\d+(?:[.,]\d+)?)\s*"
+)
+# Units that aren't in the registry but are how ingredients are counted
+_COUNT_WORDS = {
+    "can", "cans", "clove", "cloves", "pinch", "pinches", "dash", "dashes", "stick", "sticks",
+    "package", "packages", "pkg", "pkgs", "slice", "slices", "bunch", "bunches", "head", "heads",
+    "sprig", "sprigs", "jar", "jars", "bottle", "bottles", "bag", "bags",
+}
+_SIZES = re.compile(r"^(?:large|medium|small|big)\s+", re.IGNORECASE)
+EMPTY_POSITION = -1  # marker row: the recipe was parsed and has no ingredients
+
+_TRAILING = re.compile(r"\s+(?:to taste|as needed|for \w+.*|optional)$", re.IGNORECASE)
+
+
+class ParsedIngredient(NamedTuple):
+    name: str
+    quantity: Optional[float]  # None for "salt to taste"
+    unit: str
+
+
+def _number(text: str) -> float:
+    total = 0.0
+    for part in text.replace(",", ".").split():
+        if "/" in part:
+            num, den = part.split("/")
+            total += float(num) / float(den) if float(den) else 0.0
+        elif part[-1] in _FRACTIONS:
+            total += (float(part[:-1]) if part[:-1] else 0.0) + _FRACTIONS[part[-1]]
+        else:
+            total += float(part)
+    return total
+
+
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Best-effort (name, quantity, unit) from a recipe ingredient line."""
+    text = re.sub(r"\([^)]*\)", " ", line or "").strip()
+    quantity = None
+    match = _QUANTITY.match(text)
+    if match:
+        quantity = _number(match.group(2))
+        text = text[match.end():]
+
+    unit = ""
+    words = text.split()
+    for size in (2, 1):  # "fl oz" before "oz"
+        candidate = " ".join(words[:size]).rstrip(".").lower()
+        if len(words) > size and (units.parse_unit(candidate).dimension in units.BASE_UNITS
+                                  or candidate in _COUNT_WORDS):
+            unit = units.parse_unit(candidate).name
+            text = " ".join(words[size:])
+            break
+    text = re.sub(r"^of\s+", "", text.strip(), flags=re.IGNORECASE)
+    text = _SIZES.sub("", text)
+    name = _TRAILING.sub("", text.split(",")[0].strip(" -.")).strip()
+    return ParsedIngredient(name, quantity, unit)
+
+
+def _source_hash(ingredients_json: str) -> str:
+    return hashlib.sha1((ingredients_json or "[]").encode("utf-8")).hexdigest()[:16]
+
+
+def for_recipes(db: Session, recipes: Iterable) -> Dict[int, List[RecipeIngredient]]:
+    """Parsed ingredients per recipe id, reparsing only recipes whose ingredient list changed.
+
+    recipes need .id and .ingredients (the JSON text column). Caller commits.
+    """
+    recipes = {r.id: r for r in recipes}
+    if not recipes:
+        return {}
+    cached: Dict[int, List[RecipeIngredient]] = {}
+    hashes = {}
+    for row in (db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id.in_(recipes))
+                .order_by(RecipeIngredient.recipe_id, RecipeIngredient.position)):
+        rows = cached.setdefault(row.recipe_id, [])
+        if row.position != EMPTY_POSITION:
+            rows.append(row)
+        hashes[row.recipe_id] = row.source_hash
+
+    stale = [rid for rid, r in recipes.items() if hashes.get(rid) != _source_hash(r.ingredients)]
+    if stale:
+        db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id.in_(stale)).delete(synchronize_session=False)
+        rows = []
+        for rid in stale:
+            source_hash = _source_hash(recipes[rid].ingredients)
+            parsed_any = False
+            for position, line in enumerate(json.loads(recipes[rid].ingredients or "[]")):
+                parsed = parse_ingredient(line)
+                if not parsed.name:
+                    continue
+                base_quantity, base_unit = units.to_base(parsed.quantity, parsed.unit)
+                rows.append({
+                    "recipe_id": rid, "position": position, "line": line, "source_hash": source_hash,
+                    "name": parsed.name, "normalized_name": normalize_name(parsed.name),
+                    "quantity": parsed.quantity, "unit": parsed.unit,
+                    "base_quantity": base_quantity if parsed.quantity is not None else None,
+                    "base_unit": base_unit,
+                })
+                parsed_any = True
+            if not parsed_any:
+                rows.append({
+                    "recipe_id": rid, "position": EMPTY_POSITION, "line": "", "source_hash": source_hash,
+                    "name": "", "normalized_name": "", "quantity": None, "unit": "", "base_quantity": None,
+                    "base_unit": "",
+                })
+        db.execute(insert(RecipeIngredient), rows)
+        for rid in stale:
+            cached[rid] = [
+                RecipeIngredient(**row) for row in rows
+                if row["recipe_id"] == rid and row["position"] != EMPTY_POSITION
+            ]
+    return cached
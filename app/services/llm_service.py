@@ -0,0 +1,71 @@
+"""
+Shared wrapper around the Anthropic Messages API.
+
+Every AI feature sends its static instructions and examples as a cached
+system block, and only the per-request data as the user message, so
+repeat calls can be served from the prompt cache. Each call is recorded
+in the llm_calls table for cost and latency reporting.
+"""
+import logging
+import time
+
+from ..config import settings
+from ..database import SessionLocal
+from ..lazy import require
+from ..models import LlmCall
+
+logger = logging.getLogger(__name__)
+
+MODEL = "claude-haiku-4-5-20251001"
+
+
+def complete(feature: str, system: str, prompt: str, max_tokens: int) -> str:
+    """Run one completion and return the stripped response text."""
+    anthropic = require("anthropic")
+    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    started = time.perf_counter()
+    message = None
+    error = None
+    try:
+        message = client.messages.create(
+            model=MODEL,
+            max_tokens=max_tokens,
+            system=[{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return message.content[0].text.strip()
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _record(feature, message, time.perf_counter() - started, error)
+
+
+def _record(feature: str, message, elapsed: float, error) -> None:
+    """Persist usage for one call. Never let accounting break the feature."""
+    usage = getattr(message, "usage", None)
+    if error:
+        outcome = "error"
+    elif getattr(message, "stop_reason", None) == "max_tokens":
+        outcome = "truncated"
+    else:
+        outcome = "ok"
+
+    db = SessionLocal()
+    try:
+        db.add(LlmCall(
+            feature=feature,
+            model=MODEL,
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            cache_creation_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            latency_ms=round(elapsed * 1000),
+            outcome=outcome,
+            error=(error or "")[:500],
+        ))
+        db.commit()
+    except Exception as e:
+        logger.warning("Could not record LLM call for %s: %s", feature, e)
+    finally:
+        db.close()
@@ -0,0 +1,143 @@
+"""
+Meal plan ranges, bulk upserts and week templates.
+
+upsert_entries() writes any number of slots with one
+INSERT ... ON CONFLICT(date, meal_type) against uq_meal_plan_date_type.
+Around it are one SELECT of the existing slots (for change history) and
+one reload. Planning a month costs the same four statements as planning a
+day. Callers commit.
+"""
+import json
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .. import history
+from ..models import MealPlanEntry, MealPlanTemplate
+
+MAX_RANGE_DAYS = 186  # about six months
+
+MEAL_ORDER = case(
+    (MealPlanEntry.meal_type == "breakfast", 1),
+    (MealPlanEntry.meal_type == "lunch", 2),
+    (MealPlanEntry.meal_type == "dinner", 3),
+)
+
+
+def week_monday(d: date) -> date:
+    """Return the Monday of the week containing d."""
+    return d - timedelta(days=d.weekday())
+
+
+def list_range(db: Session, start: date, end: date) -> List[MealPlanEntry]:
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Range is limited to {MAX_RANGE_DAYS} days")
+    return (
+        db.query(MealPlanEntry)
+        .filter(MealPlanEntry.date >= start, MealPlanEntry.date <= end)
+        .order_by(MealPlanEntry.date, MEAL_ORDER)
+        .all()
+    )
+
+
+def upsert_entries(db: Session, entries: Iterable[dict], overwrite: bool = True) -> List[MealPlanEntry]:
+    """Create or replace slots ({date, meal_type, meal_name, notes}); returns the slots' current rows.
+
+    With overwrite=False, slots that are already planned are left alone.
+    A later entry for the same slot wins over an earlier one.
+    """
+    rows = {}
+    for entry in entries:
+        rows[(entry["date"], entry["meal_type"])] = {
+            "date": entry["date"],
+            "meal_type": entry["meal_type"],
+            "meal_name": entry["meal_name"],
+            "notes": entry.get("notes") or "",
+            "recipe_id": entry.get("recipe_id"),
+        }
+    if not rows:
+        return []
+
+    dates = sorted({d for d, _ in rows})
+    existing = {
+        (r.date, r.meal_type): r
+        for r in db.query(
+            MealPlanEntry.date, MealPlanEntry.meal_type, MealPlanEntry.meal_name, MealPlanEntry.notes,
+            MealPlanEntry.recipe_id,
+        )
+        .filter(MealPlanEntry.date.in_(dates))
+    }
+
+    stmt = sqlite_insert(MealPlanEntry).values(list(rows.values()))
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MealPlanEntry.date, MealPlanEntry.meal_type],
+            set_={
+                "meal_name": stmt.excluded.meal_name, "notes": stmt.excluded.notes,
+                "recipe_id": stmt.excluded.recipe_id, "updated_at": func.now(),
+            },
+            # Unchanged slots keep their updated_at and sync sequence
+            where=MealPlanEntry.meal_name.is_distinct_from(stmt.excluded.meal_name)
+            | MealPlanEntry.notes.is_distinct_from(stmt.excluded.notes)
+            | MealPlanEntry.recipe_id.is_distinct_from(stmt.excluded.recipe_id),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[MealPlanEntry.date, MealPlanEntry.meal_type])
+    written = db.execute(stmt.returning(MealPlanEntry.id, MealPlanEntry.date, MealPlanEntry.meal_type)).all()
+
+    changes = []
+    for entry_id, d, meal_type in written:
+        new, old = rows[(d, meal_type)], existing.get((d, meal_type))
+        if old is None:
+            values = {k: [None, v.isoformat() if k == "date" else v] for k, v in new.items() if v is not None}
+            changes.append(("meal_plan", entry_id, "create", values))
+        else:
+            diff = {k: [getattr(old, k), new[k]] for k in ("meal_name", "notes", "recipe_id") if getattr(old, k) != new[k]}
+            changes.append(("meal_plan", entry_id, "update", diff))
+    if changes:
+        history.append(db.connection(), changes)
+
+    return [
+        e for e in db.query(MealPlanEntry)
+        .filter(MealPlanEntry.date.in_(dates))
+        .order_by(MealPlanEntry.date, MEAL_ORDER)
+        if (e.date, e.meal_type) in rows
+    ]
+
+
+def create_template(db: Session, name: str, entries: List[dict], from_week: Optional[date] = None) -> MealPlanTemplate:
+    """Save a template from explicit entries, or from the week containing from_week."""
+    name = name.strip()
+    if not name:
+        raise ValueError("Template name is required")
+    if db.query(MealPlanTemplate.id).filter(MealPlanTemplate.name == name).first():
+        raise ValueError(f"A template named '{name}' already exists")
+    if from_week is not None:
+        monday = week_monday(from_week)
+        entries = [
+            {
+                "weekday": e.date.weekday(), "meal_type": e.meal_type, "meal_name": e.meal_name,
+                "notes": e.notes or "", "recipe_id": e.recipe_id,
+            }
+            for e in list_range(db, monday, monday + timedelta(days=6))
+        ]
+    if not entries:
+        raise ValueError("A template needs at least one meal")
+    template = MealPlanTemplate(name=name, entries=json.dumps(entries))
+    db.add(template)
+    return template
+
+
+def apply_template(db: Session, template: MealPlanTemplate, week: date, overwrite: bool = True) -> List[MealPlanEntry]:
+    """Stamp a template onto the week containing `week` in one upsert."""
+    monday = week_monday(week)
+    if monday < week_monday(date.today()):
+        raise ValueError("Templates can only be applied to the current or a future week")
+    return upsert_entries(db, (
+        {**e, "date": monday + timedelta(days=e["weekday"])} for e in json.loads(template.entries)
+    ), overwrite=overwrite)
@@ -0,0 +1,80 @@
+"""
+Pluggable notification sinks.
+
+A sink is a function taking (event, payload). Sinks register with
+@sink("name") and are switched on by listing them in DIGEST_SINKS. The
+built-ins write to the log, append to an NDJSON file, or POST JSON to a
+webhook (for example a home-automation or push relay). A failing sink is
+logged and never stops the others.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict
+
+from ..config import settings
+from ..lazy import require
+
+logger = logging.getLogger(__name__)
+
+_sinks: Dict[str, Callable[[str, dict], None]] = {}
+_file_lock = threading.Lock()
+
+
+def sink(name: str):
+    def decorator(fn):
+        _sinks[name] = fn
+        return fn
+    return decorator
+
+
+def enabled() -> list:
+    return [name.strip() for name in settings.digest_sinks.split(",") if name.strip()]
+
+
+def deliver(event: str, payload: dict) -> int:
+    """Send to every enabled sink. Returns how many succeeded."""
+    delivered = 0
+    for name in enabled():
+        fn = _sinks.get(name)
+        if fn is None:
+            logger.warning("Unknown notification sink '%s'", name)
+            continue
+        try:
+            fn(event, payload)
+            delivered += 1
+        except Exception as e:
+            logger.warning("Notification sink %s failed for %s: %s", name, event, e)
+    return delivered
+
+
+@sink("log")
+def _log_sink(event: str, payload: dict) -> None:
+    counts = payload.get("counts", {})
+    logger.info(
+        "[%s] %s: %s",
+        payload.get("household", ""), event, ", ".join(f"{n} {k}" for k, n in counts.items()),
+    )
+
+
+@sink("file")
+def _file_sink(event: str, payload: dict) -> None:
+    os.makedirs(os.path.dirname(settings.digest_file_path) or ".", exist_ok=True)
+    line = json.dumps({"event": event, **payload}, default=str)
+    with _file_lock, open(settings.digest_file_path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@sink("webhook")
+def _webhook_sink(event: str, payload: dict) -> None:
+    if not settings.digest_webhook_url:
+        raise ValueError("DIGEST_WEBHOOK_URL is not set")
+    requests = require("requests")
+    resp = requests.post(
+        settings.digest_webhook_url,
+        data=json.dumps({"event": event, **payload}, default=str),
+        headers={"Content-Type": "application/json"},
+        timeout=10,
+    )
+    resp.raise_for_status()
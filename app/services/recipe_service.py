@@ -1,31 +1,13 @@
 import json
-import anthropic
 from typing import List
 
 from ..config import settings
 from ..models import Item
+from .llm_service import complete
 
 
-def get_recipe_suggestions(items: List[Item], dietary_notes: str = "") -> list:
-    if not settings.anthropic_api_key:
-        raise ValueError("ANTHROPIC_API_KEY is not configured. Add it to your .env file.")
-
-    inventory_lines = []
-    for item in items:
-        if item.unit:
-            qty_str = f"{item.quantity} {item.unit}"
-        else:
-            qty_str = str(item.quantity)
-        cat = item.category.name if item.category else "misc"
-        inventory_lines.append(f"- {item.name} ({cat}): {qty_str}")
-
-    inventory_text = "\n".join(inventory_lines)
-    dietary_part = f"\nDietary notes/restrictions: {dietary_notes}" if dietary_notes else ""
-
-    prompt = f"""Given the following kitchen inventory, suggest 3-5 recipes I can make.
-
-Inventory:
-{inventory_text}{dietary_part}
+# Static instructions + example — sent as a cached system block
+SYSTEM_PROMPT = """Given the user's kitchen inventory, suggest 3-5 recipes they can make.
 
 Respond with ONLY a valid JSON array of recipe objects. No markdown, no explanation, just the JSON.
 Each recipe must have:
@@ -37,25 +19,39 @@ Each recipe must have:
 
 Example format:
 [
-  {{
+  {
     "name": "Pasta Primavera",
     "description": "A light pasta dish with fresh vegetables.",
     "ingredients": ["200g pasta", "2 cloves garlic", "1 zucchini"],
     "instructions": ["Boil pasta.", "Saute garlic.", "Combine and serve."],
     "uses_items": ["pasta", "garlic", "zucchini"]
-  }}
+  }
 ]"""
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
 
-    message = client.messages.create(
-        model="claude-haiku-4-5-20251001",
+def get_recipe_suggestions(items: List[Item], dietary_notes: str = "") -> list:
+    if not settings.anthropic_api_key:
+        raise ValueError("ANTHROPIC_API_KEY is not configured. Add it to your .env file.")
+
+    inventory_lines = []
+    for item in items:
+        if item.unit:
+            qty_str = f"{item.quantity} {item.unit}"
+        else:
+            qty_str = str(item.quantity)
+        cat = item.category.name if item.category else "misc"
+        inventory_lines.append(f"- {item.name} ({cat}): {qty_str}")
+
+    inventory_text = "\n".join(inventory_lines)
+    dietary_part = f"\nDietary notes/restrictions: {dietary_notes}" if dietary_notes else ""
+
+    response_text = complete(
+        "recipe_suggest",
+        SYSTEM_PROMPT,
+        f"Inventory:\n{inventory_text}{dietary_part}",
         max_tokens=2048,
-        messages=[{"role": "user", "content": prompt}],
     )
 
-    response_text = message.content[0].text.strip()
-
     # Strip markdown code fences if present
     if response_text.startswith("```"):
         lines = response_text.split("\n")
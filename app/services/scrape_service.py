@@ -1,9 +1,9 @@
 import json
 import re
-import requests
-from bs4 import BeautifulSoup
 
 from ..config import settings
+from ..lazy import require
+from .llm_service import complete
 
 
 def _format_time(minutes) -> str:
@@ -78,8 +78,8 @@ _BROWSER_HEADERS = {
 }
 
 
-def _browser_session() -> requests.Session:
-    s = requests.Session()
+def _browser_session():
+    s = require("requests").Session()
     s.headers.update(_BROWSER_HEADERS)
     return s
 
@@ -91,7 +91,7 @@ def parse_recipe_html(html: str, url: str = "") -> dict:
     recipe-scrapers can select the right site-specific parser. Falls back to
     wild_mode (Schema.org) for unrecognized sites.
     """
-    from recipe_scrapers import scrape_html
+    scrape_html = require("recipe_scrapers").scrape_html
     try:
         scraper = scrape_html(html, org_url=url or "https://unknown.example.com", wild_mode=True)
     except Exception as e:
@@ -134,7 +134,7 @@ def scrape_recipe_url(url: str) -> dict:
 
     # 1. Try recipe-scrapers with our pre-fetched HTML
     try:
-        from recipe_scrapers import scrape_html
+        scrape_html = require("recipe_scrapers").scrape_html
         scraper = scrape_html(html, org_url=url)
         if _quality_ok(scraper):
             return _build_result(scraper, url)
@@ -151,42 +151,35 @@ def scrape_recipe_url(url: str) -> dict:
     return _claude_scrape(url, html)
 
 
-def _claude_scrape(url: str, html: str) -> dict:
-    import anthropic
-
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        tag.decompose()
-
-    text = soup.get_text(separator="\n", strip=True)
-    text = text[:8000]
-
-    prompt = f"""Extract the recipe from this webpage content. Return ONLY valid JSON, no markdown.
-
-URL: {url}
-
-Content:
-{text}
+# Static extraction instructions — sent as a cached system block
+_SCRAPE_SYSTEM_PROMPT = """Extract the recipe from the webpage content the user sends. Return ONLY valid JSON, no markdown.
 
 Return this exact JSON structure:
-{{
+{
   "title": "Recipe Name",
   "total_time": "45 min",
   "yields": "4 servings",
   "ingredients": ["1 cup flour", "2 eggs"],
   "instructions": ["Preheat oven to 350F.", "Mix ingredients."]
-}}
+}
+
+If you cannot find a recipe, return: {"error": "No recipe found"}"""
+
+
+def _claude_scrape(url: str, html: str) -> dict:
+    soup = require("bs4").BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
 
-If you cannot find a recipe, return: {{"error": "No recipe found"}}"""
+    text = soup.get_text(separator="\n", strip=True)
+    text = text[:8000]
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-    message = client.messages.create(
-        model="claude-haiku-4-5-20251001",
+    response_text = complete(
+        "scrape_fallback",
+        _SCRAPE_SYSTEM_PROMPT,
+        f"URL: {url}\n\nContent:\n{text}",
         max_tokens=2048,
-        messages=[{"role": "user", "content": prompt}],
     )
-
-    response_text = message.content[0].text.strip()
     if response_text.startswith("```"):
         lines = response_text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
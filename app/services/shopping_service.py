@@ -0,0 +1,177 @@
+"""Shopping-list merging with unit-aware quantity math (app/units.py), and generation from the meal plan."""
+import math
+from collections import Counter
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .. import history, units
+from ..models import Item, SavedRecipe, ShoppingListItem, normalize_name
+from . import ingredient_service, mealplan_service
+
+
+def merge_key(name: str, unit: Optional[str]) -> tuple:
+    """Rows with equal keys are the same thing in convertible units."""
+    return normalize_name(name), units.parse_unit(unit).dimension
+
+
+def open_rows(db: Session) -> Dict[tuple, ShoppingListItem]:
+    """Unchecked rows by merge key, loaded once for batch merging."""
+    rows = {}
+    for row in db.query(ShoppingListItem).filter(ShoppingListItem.is_checked == False).order_by(ShoppingListItem.id):
+        rows.setdefault(merge_key(row.name, row.unit), row)
+    return rows
+
+
+def find_open(db: Session, name: str, unit: Optional[str]) -> Optional[ShoppingListItem]:
+    return open_rows(db).get(merge_key(name, unit))
+
+
+def add_or_merge(
+    db: Session, name: str, quantity: float, unit: str = "", source: str = "manual",
+    item_id: Optional[int] = None, index: Optional[dict] = None,
+) -> Tuple[ShoppingListItem, bool]:
+    """Add to an existing open row (converted to its unit) or create one. Returns (row, merged).
+
+    Pass index=open_rows(db) when adding many rows, so the list is read once
+    and rows created earlier in the batch are merged into as well.
+    """
+    if index is None:
+        index = open_rows(db)
+    key = merge_key(name, unit)
+    existing = index.get(key)
+    if existing is not None:
+        existing.quantity = round((existing.quantity or 0) + units.convert(quantity, unit, existing.unit), 3)
+        return existing, True
+    row = ShoppingListItem(name=name, quantity=quantity, unit=unit, source=source, item_id=item_id)
+    db.add(row)
+    index[key] = row
+    return row, False
+
+
+def _match_key(name: str) -> str:
+    """normalize_name plus naive singular folding, so "eggs" in a recipe meets "Egg" in stock."""
+    key = normalize_name(name)
+    if key.endswith("ies") and len(key) > 4:
+        return key[:-3] + "y"
+    if key.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return key[:-2]
+    if key.endswith("s") and not key.endswith("ss") and len(key) > 3:
+        return key[:-1]
+    return key
+
+
+def _display(base_quantity: float, base_unit: str, unit: str) -> Tuple[float, str]:
+    """A shopping quantity in the recipe's unit where it has one (473 ml -> 2 cup), else readable base units."""
+    if unit and units.parse_unit(unit).dimension in (units.MASS, units.VOLUME):
+        return round(units.convert(base_quantity, base_unit, unit), 2), unit
+    if base_unit == "g" and base_quantity >= 1000:
+        return round(base_quantity / 1000, 2), "kg"
+    if base_unit == "ml" and base_quantity >= 1000:
+        return round(base_quantity / 1000, 2), "l"
+    if base_unit in ("g", "ml"):
+        return round(base_quantity), base_unit
+    # Counted things (eggs, cans, cloves) are bought whole
+    return float(math.ceil(base_quantity - 1e-9)), "" if base_unit == "each" else base_unit
+
+
+def from_meal_plan(db: Session, start: date, end: date, dry_run: bool = False) -> dict:
+    """Add what the planned meals in [start, end] need beyond stock and the open list.
+
+    Entries resolve to saved recipes by recipe_id, or by a title equal to the
+    meal name. Ingredient quantities are summed per name and unit dimension
+    in base units. Stock and unchecked shopping rows are subtracted, and the
+    deficits are inserted with one INSERT. Ingredients without a quantity
+    ("salt to taste") are only added when nothing by that name is stocked
+    or listed. Ingredients stocked or listed only in units that don't convert
+    to the recipe's (cups of flour against 5 lb, cloves of garlic against
+    one head) aren't added either; they are reported in "unknown". Caller
+    commits.
+    """
+    entries = mealplan_service.list_range(db, start, end)
+    by_title = {normalize_name(e.meal_name) for e in entries if e.recipe_id is None}
+    ids = {e.recipe_id for e in entries if e.recipe_id is not None}
+    recipe_by_title = {}
+    if by_title:
+        # Titles are matched with normalize_name in Python: SQLite's lower() only folds ASCII
+        for rid, title in db.query(SavedRecipe.id, SavedRecipe.title).order_by(SavedRecipe.id.desc()):
+            if normalize_name(title) in by_title:
+                recipe_by_title[normalize_name(title)] = rid
+    recipes = db.query(SavedRecipe.id, SavedRecipe.ingredients).filter(
+        SavedRecipe.id.in_(ids | set(recipe_by_title.values()))
+    ).all() if ids or recipe_by_title else []
+    planned = Counter()
+    unmatched = []
+    for e in entries:
+        rid = e.recipe_id if e.recipe_id is not None else recipe_by_title.get(normalize_name(e.meal_name))
+        if rid is None:
+            unmatched.append(e.meal_name)
+        else:
+            planned[rid] += 1
+    parsed = ingredient_service.for_recipes(db, (r for r in recipes if r.id in planned))
+
+    # (name key, unit dimension) -> [display name, base quantity or None, base unit, first recipe unit]
+    needs: Dict[tuple, list] = {}
+    for rid, times in planned.items():
+        for ing in parsed.get(rid, []):
+            key = (_match_key(ing.name), units.parse_unit(ing.base_unit).dimension)
+            need = needs.setdefault(key, [ing.name, None, ing.base_unit, ing.unit])
+            if ing.base_quantity is not None:
+                need[1] = (need[1] or 0.0) + ing.base_quantity * times
+
+    have = Counter()  # (name key, dimension) -> base quantity in stock or already listed
+    have_any = set()  # name keys with anything in stock or listed, in any unit
+    stock = db.query(Item.normalized_name, Item.base_unit, func.sum(Item.base_quantity)).filter(
+        Item.quantity > 0
+    ).group_by(Item.normalized_name, Item.base_unit)
+    listed = db.query(ShoppingListItem.name, ShoppingListItem.base_unit, ShoppingListItem.base_quantity).filter(
+        ShoppingListItem.is_checked == False
+    ).all()
+    for name, base_unit, quantity in list(stock) + listed:
+        key = _match_key(name)
+        have[(key, units.parse_unit(base_unit).dimension)] += quantity or 0.0
+        have_any.add(key)
+
+    deficits, covered, unknown = [], [], []
+    for (key, dimension), (name, quantity, base_unit, unit) in sorted(needs.items()):
+        if quantity is None:
+            missing = 1.0 if key not in have_any else 0.0
+        elif key in have_any and (key, dimension) not in have:
+            # In stock, but not in a unit we can compare with: don't buy the full amount blind
+            unknown.append(name)
+            continue
+        else:
+            missing = quantity - have[(key, dimension)]
+        if missing <= 1e-9:
+            covered.append(name)
+            continue
+        shown, shown_unit = _display(missing, base_unit, unit) if quantity is not None else (1.0, "")
+        deficits.append({
+            "name": name, "quantity": shown, "unit": shown_unit,
+            "base_quantity": missing if quantity is not None else 1.0,
+            "base_unit": base_unit if quantity is not None else "each",
+            "source": "mealplan", "is_checked": False,
+        })
+
+    added = []
+    if deficits and not dry_run:
+        # sort_by_parameter_order: ids come back in deficits order, so zip pairs them correctly
+        stmt = insert(ShoppingListItem).returning(ShoppingListItem.id, sort_by_parameter_order=True)
+        ids = db.execute(stmt, deficits).scalars().all()
+        history.append(db.connection(), [
+            ("shopping", row_id, "create", {k: [None, row[k]] for k in ("name", "quantity", "unit", "is_checked", "source")})
+            for row_id, row in zip(ids, deficits)
+        ])
+        added = db.query(ShoppingListItem).filter(ShoppingListItem.id.in_(ids)).order_by(ShoppingListItem.id).all()
+    return {
+        "start": start,
+        "end": end,
+        "recipes": len(planned),
+        "unmatched_meals": sorted(set(unmatched)),
+        "needed": [{"name": d["name"], "quantity": d["quantity"], "unit": d["unit"]} for d in deficits],
+        "covered": sorted(set(covered)),
+        "unknown": sorted(set(unknown)),
+        "added": added,
+    }
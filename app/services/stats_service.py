@@ -0,0 +1,63 @@
+"""Dashboard counts read from the trigger-maintained inventory_rollups table."""
+from datetime import date, timedelta
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from .. import dimensions
+from ..models import InventoryRollup
+
+EXPIRING_DAYS = 7  # same window as ItemOut.is_expiring_soon
+
+
+def _counts(item_count=0, low=0, expired=0, expiring=0) -> dict:
+    return {"items": item_count or 0, "low": low or 0, "expired": expired or 0, "expiring": expiring or 0}
+
+
+def item_count(db: Session, dimension: str, dim_id: int) -> int:
+    return db.query(func.coalesce(func.sum(InventoryRollup.item_count), 0)).filter(
+        InventoryRollup.dimension == dimension, InventoryRollup.dim_id == dim_id
+    ).scalar()
+
+
+def get_stats(db: Session) -> dict:
+    today = date.today().isoformat()
+    soon = (date.today() + timedelta(days=EXPIRING_DAYS)).isoformat()
+    exp = InventoryRollup.expiration_date
+    rows = (
+        db.query(
+            InventoryRollup.dimension,
+            InventoryRollup.dim_id,
+            func.sum(InventoryRollup.item_count),
+            func.sum(InventoryRollup.low_count),
+            func.sum(case(((exp != "") & (exp < today), InventoryRollup.item_count), else_=0)),
+            func.sum(case(((exp >= today) & (exp <= soon), InventoryRollup.item_count), else_=0)),
+        )
+        .group_by(InventoryRollup.dimension, InventoryRollup.dim_id)
+        .all()
+    )
+    counts = {(dim, dim_id): _counts(*values) for dim, dim_id, *values in rows}
+
+    snapshot = dimensions.get(db)
+
+    def buckets(dimension, rows):
+        out = [
+            {"id": obj.id, "name": obj.name, **counts.get((dimension, obj.id), _counts())}
+            for obj in rows.values()
+        ]
+        if (dimension, 0) in counts:
+            out.append({"id": None, "name": "Unassigned", **counts[(dimension, 0)]})
+        return out
+
+    locations = buckets("location", snapshot.locations)
+    totals = _counts()
+    for bucket in locations:
+        for key in totals:
+            totals[key] += bucket[key]
+
+    return {
+        "totals": totals,
+        "locations": locations,
+        "categories": buckets("category", snapshot.categories),
+        "empty_locations": [b["id"] for b in locations if b["id"] is not None and b["items"] == 0],
+    }
@@ -0,0 +1,94 @@
+"""
+Delta sync over the change sequence maintained by the sync triggers.
+
+Every insert or update on a syncable table stamps the row with the next
+value of sync_state.seq. Every delete writes a tombstone under its own
+seq. A client that remembers the last seq it saw can fetch only what
+changed since then. Tombstones are compacted after a retention period.
+Clients whose cursor is older than the compaction horizon are told to do
+a full resync.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import dimensions, scheduler, tenancy
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Item, ShoppingListItem, MealPlanEntry, SavedRecipe, SyncState, SyncTombstone
+
+logger = logging.getLogger(__name__)
+
+SYNC_MODELS = {
+    "items": Item,
+    "shopping_list": ShoppingListItem,
+    "meal_plan_entries": MealPlanEntry,
+    "saved_recipes": SavedRecipe,
+}
+
+
+def changes_since(db: Session, since: int) -> dict:
+    """Rows changed and ids deleted after `since`, up to the current seq."""
+    state = db.query(SyncState).filter(SyncState.id == 1).first()
+    seq = state.seq if state else 0
+    compacted = state.compacted_through if state else 0
+
+    # Tombstones the client needs may be gone, or the cursor is from another DB
+    full_resync = since < compacted or since > seq
+    lower = 0 if full_resync else since
+
+    changes = {
+        name: (
+            db.query(model)
+            .filter(model.change_seq > lower, model.change_seq <= seq)
+            .order_by(model.change_seq)
+            .all()
+        )
+        for name, model in SYNC_MODELS.items()
+    }
+    # Item.category / Item.location from the cache, not a lazy load per distinct id
+    dimensions.hydrate(db, changes["items"])
+
+    deleted = defaultdict(list)
+    if not full_resync:
+        rows = (
+            db.query(SyncTombstone.table_name, SyncTombstone.row_id)
+            .filter(SyncTombstone.seq > since, SyncTombstone.seq <= seq)
+            .order_by(SyncTombstone.seq)
+            .all()
+        )
+        for table_name, row_id in rows:
+            deleted[table_name].append(row_id)
+
+    return {
+        "seq": seq,
+        "full_resync": full_resync,
+        "changes": changes,
+        "deleted": {name: deleted.get(name, []) for name in SYNC_MODELS},
+    }
+
+
+@scheduler.every(settings.sync_compact_interval_hours * 3600, run_at_start=True)
+def compact_all_households() -> None:
+    tenancy.for_each_household(compact_tombstones)
+
+
+def compact_tombstones() -> None:
+    """Drop tombstones past retention and advance the compaction horizon."""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=settings.sync_tombstone_retention_days)
+    db = SessionLocal()
+    try:
+        horizon = db.query(func.max(SyncTombstone.seq)).filter(SyncTombstone.deleted_at < cutoff).scalar()
+        if not horizon:
+            return
+        removed = db.query(SyncTombstone).filter(SyncTombstone.seq <= horizon).delete(synchronize_session=False)
+        db.query(SyncState).filter(SyncState.id == 1, SyncState.compacted_through < horizon).update(
+            {"compacted_through": horizon}, synchronize_session=False
+        )
+        db.commit()
+        logger.info("Compacted %d sync tombstones through seq %d", removed, horizon)
+    finally:
+        db.close()
@@ -0,0 +1,154 @@
+"""
+Streaming inventory import and export (CSV or NDJSON).
+
+Both directions hold a bounded number of rows in memory. Import reads the
+uploaded file row by row, validates each row with ItemCreate, and resolves
+category and location names through a map loaded once. It inserts in
+chunks with a single executemany per chunk, committing after each chunk
+so the write lock is held briefly. Bad rows are reported and skipped, and
+the rest still import. Export streams straight from a server-side cursor.
+
+Columns: name, quantity, unit, category, location, expiration_date,
+notes, low_threshold. Only name is required.
+"""
+import csv
+import io
+import json
+from typing import IO, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import Item, Category, Location
+from ..schemas import ItemCreate
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+COLUMNS = ["name", "quantity", "unit", "category", "location", "expiration_date", "notes", "low_threshold"]
+
+CHUNK_ROWS = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(fmt: Optional[str], content_type: str) -> str:
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}' (use csv or ndjson)")
+        return fmt
+    return "ndjson" if "json" in (content_type or "") else "csv"
+
+
+def _rows(fileobj: IO[bytes], fmt: str) -> Iterator[tuple]:
+    """Yield (row number, dict or error string) without reading the whole file."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if reader.fieldnames is None:
+            return
+        if "name" not in [f.strip().lower() for f in reader.fieldnames]:
+            raise ValueError("CSV header must include a 'name' column")
+        for row in reader:
+            yield reader.line_num, {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+    else:
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, f"invalid JSON: {e.msg}"
+                continue
+            yield number, row if isinstance(row, dict) else "each line must be a JSON object"
+
+
+def _name_map(db: Session, model) -> dict:
+    return {name.strip().lower(): id_ for id_, name in db.query(model.id, model.name)}
+
+
+def _to_values(row: dict, categories: dict, locations: dict) -> dict:
+    """Validate one input row and return column values for the insert."""
+    data = {k: v for k, v in row.items() if v not in ("", None)}
+    for field, names in (("category", categories), ("location", locations)):
+        name = data.pop(field, None)
+        if name is None or f"{field}_id" in data:
+            continue
+        id_ = names.get(str(name).strip().lower())
+        if id_ is None:
+            raise ValueError(f"unknown {field} '{name}'")
+        data[f"{field}_id"] = id_
+    return ItemCreate(**data).model_dump()
+
+
+def import_items(db: Session, fileobj: IO[bytes], fmt: str) -> dict:
+    """Import every valid row. Returns counts plus the first few row errors."""
+    categories = _name_map(db, Category)
+    locations = _name_map(db, Location)
+    imported = 0
+    failed = 0
+    errors = []
+    chunk = []
+
+    def flush():
+        nonlocal imported
+        if chunk:
+            db.execute(insert(Item), chunk)
+            db.commit()
+            imported += len(chunk)
+            chunk.clear()
+
+    for number, row in _rows(fileobj, fmt):
+        try:
+            if isinstance(row, str):
+                raise ValueError(row)
+            chunk.append(_to_values(row, categories, locations))
+        except ValidationError as e:
+            err = e.errors()[0]
+            field = ".".join(str(p) for p in err["loc"])
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": number, "error": f"{field}: {err['msg']}"})
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": number, "error": str(e)})
+        if len(chunk) >= CHUNK_ROWS:
+            flush()
+    flush()
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+def export_items(fmt: str) -> Iterator[str]:
+    """Yield the inventory as CSV or NDJSON text, a chunk of rows at a time."""
+    stmt = (
+        select(
+            Item.name, Item.quantity, Item.unit,
+            Category.name.label("category"), Location.name.label("location"),
+            Item.expiration_date, Item.notes, Item.low_threshold,
+        )
+        .outerjoin(Category, Item.category_id == Category.id)
+        .outerjoin(Location, Item.location_id == Location.id)
+        .order_by(Item.id)
+    )
+    # Own session: the response streams after the request's dependencies have closed
+    db = SessionLocal()
+    try:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(COLUMNS)
+        for partition in db.execute(stmt.execution_options(yield_per=CHUNK_ROWS)).partitions():
+            for row in partition:
+                values = row._asdict()
+                if values["expiration_date"] is not None:
+                    values["expiration_date"] = values["expiration_date"].isoformat()
+                if fmt == "csv":
+                    writer.writerow(["" if values[c] is None else values[c] for c in COLUMNS])
+                else:
+                    buf.write(json.dumps(values) + "\n")
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        yield buf.getvalue()
+    finally:
+        db.close()
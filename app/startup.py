@@ -0,0 +1,21 @@
+import logging
+import time
+
+from .migrate import migrate
+from .seed import seed_data
+
+logger = logging.getLogger(__name__)
+
+
+def prepare_database(engine=None):
+    """Apply migrations and seed defaults.
+
+    Runs in the app lifespan for single-process dev servers, or once in
+    run.py before production workers start so they don't race each other.
+    Other households are provisioned with `python -m app.migrate --household <slug> --create`
+    and migrated on first access in each process (database.engine_for).
+    """
+    started = time.perf_counter()
+    migrate(engine)
+    seed_data(engine)
+    logger.info("Database ready in %.1f ms", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,65 @@
+"""
+Static file serving with precompressed variants and immutable caching.
+
+Serves the output of app.build_static when it exists, otherwise the raw
+static/ directory (dev). For each request, a .br or .gz sibling is sent
+when the client accepts that encoding. Fingerprinted files are cached
+forever. Entry points (index.html, sw.js, manifest.json) are revalidated
+on every load.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+from .compression import accepted_encodings
+from .config import settings
+
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def static_root() -> str:
+    """The built asset tree if present, else the source directory."""
+    if settings.use_static_build and os.path.exists(os.path.join(settings.static_build_dir, "index.html")):
+        return settings.static_build_dir
+    return "static"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope):
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if _FINGERPRINTED.search(path):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    async def _precompressed_response(self, path: str, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if not accepted:
+            return None
+        if path in ("", "."):
+            path = "index.html"
+        for encoding, suffix in _ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type in ("application/javascript", "image/svg+xml"):
+                media_type += "; charset=utf-8"
+            response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        return None
@@ -0,0 +1,157 @@
+"""
+Household tenancy: one SQLite database file per household.
+
+With HOUSEHOLDS_ENABLED, each request is resolved to a household slug from
+the X-Household header, then a `household` cookie. If neither is set, the
+request uses the default household. The default household is the original
+DATABASE_URL, which also holds the shared job queue. Every other household
+lives in HOUSEHOLD_DATA_DIR/<slug>.db. Each household has its own file and
+its own write lock, so one busy household never blocks another.
+
+The app does not authenticate users; the reverse proxy in front of it does,
+and it picks the household. A household selector is therefore only
+honoured on requests that carry X-Household-Proxy-Token matching
+HOUSEHOLD_PROXY_TOKEN. The proxy sets that header, and must drop any
+client-supplied copy. Other requests that try to select a household get
+403. A client IP allowlist wouldn't work here: run.py enables proxy_headers,
+so the address the app sees is the forwarded client address, not the
+proxy's.
+
+Households are provisioned explicitly, never on first request:
+
+    python -m app.migrate --household smith --create
+
+Requests for a slug without a database get 404, so made-up slugs can't
+create files.
+
+The current household is kept in a context variable rather than passed
+around, so existing code calling SessionLocal() (services, idempotency, LLM
+accounting) lands on the right database without changes. It follows
+requests into the threadpool and background tasks. Job workers and
+scheduled tasks set it explicitly with use().
+"""
+import hmac
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from .config import settings
+
+DEFAULT_HOUSEHOLD = "default"
+HEADER = "x-household"
+PROXY_TOKEN_HEADER = "x-household-proxy-token"
+COOKIE = "household"
+
+_SLUG = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+_current: ContextVar[str] = ContextVar("household", default=DEFAULT_HOUSEHOLD)
+
+
+def current() -> str:
+    return _current.get()
+
+
+@contextmanager
+def use(household: str):
+    """Run a block against one household's database."""
+    token = _current.set(household)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def validate(household: str) -> str:
+    household = household.strip().lower()
+    if not _SLUG.match(household):
+        raise ValueError("Household must be 1-63 lowercase letters, digits or hyphens")
+    return household
+
+
+def database_url(household: str) -> str:
+    if household == DEFAULT_HOUSEHOLD:
+        return settings.database_url
+    return f"sqlite:///{os.path.join(settings.household_data_dir, household + '.db')}"
+
+
+def provisioned(household: str) -> bool:
+    """True if the household's database exists (the default one always does)."""
+    if household == DEFAULT_HOUSEHOLD:
+        return True
+    return os.path.isfile(os.path.join(settings.household_data_dir, household + ".db"))
+
+
+class UnknownHousehold(LookupError):
+    pass
+
+
+def known_households() -> List[str]:
+    """Every household with a database on disk, default first."""
+    found = []
+    if settings.households_enabled and os.path.isdir(settings.household_data_dir):
+        found = sorted(
+            name[:-3] for name in os.listdir(settings.household_data_dir)
+            if name.endswith(".db") and _SLUG.match(name[:-3]) and name[:-3] != DEFAULT_HOUSEHOLD
+        )
+    return [DEFAULT_HOUSEHOLD] + found
+
+
+def for_each_household(fn: Callable[[], None]) -> None:
+    """Run fn once per household, for scheduled maintenance tasks."""
+    for household in known_households():
+        with use(household):
+            fn()
+
+
+class HouseholdMiddleware:
+    """Resolve the household for each HTTP request and bind it for the request's duration."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.households_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        raw = headers.get(HEADER) or _cookie(headers.get("cookie", ""), COOKIE)
+        if raw and not _from_proxy(headers):
+            await JSONResponse(
+                {"detail": "Household selection is only accepted from the configured proxy"}, status_code=403
+            )(scope, receive, send)
+            return
+        try:
+            household = validate(raw or DEFAULT_HOUSEHOLD)
+        except ValueError as e:
+            await JSONResponse({"detail": str(e)}, status_code=400)(scope, receive, send)
+            return
+        if not provisioned(household):
+            await JSONResponse({"detail": f"Unknown household '{household}'"}, status_code=404)(scope, receive, send)
+            return
+
+        token = _current.set(household)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+
+
+def _from_proxy(headers: Headers) -> bool:
+    token = headers.get(PROXY_TOKEN_HEADER, "")
+    return bool(settings.household_proxy_token) and hmac.compare_digest(
+        token.encode("utf-8"), settings.household_proxy_token.encode("utf-8")
+    )
+
+
+def _cookie(header: str, name: str) -> str:
+    for part in header.split(";"):
+        key, _, value = part.strip().partition("=")
+        if key == name:
+            return value
+    return ""
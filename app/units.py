@@ -0,0 +1,118 @@
+"""
+Unit registry and quantity conversion.
+
+Item and shopping units are free text. parse_unit() maps any spelling
+("Lbs.", "pound", "tablespoons") to a canonical unit with a dimension
+(mass, volume, count) and a factor to that dimension's base unit: g, ml
+or each. Units we don't recognise ("can", "bunch") form their own
+single-unit dimension. Two cans still add up; cans never convert to grams.
+
+Conversion factors between every pair of units in a dimension are
+precomputed at import. Batch helpers resolve each distinct unit once, so
+aggregations over thousands of rows cost one lookup per unit, not per row.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+MASS, VOLUME, COUNT = "mass", "volume", "count"
+BASE_UNITS = {MASS: "g", VOLUME: "ml", COUNT: "each"}
+
+# canonical unit -> (dimension, factor to base unit)
+CANONICAL = {
+    "g": (MASS, 1.0),
+    "kg": (MASS, 1000.0),
+    "mg": (MASS, 0.001),
+    "oz": (MASS, 28.349523125),
+    "lb": (MASS, 453.59237),
+    "ml": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0),
+    "tsp": (VOLUME, 4.92892159375),
+    "tbsp": (VOLUME, 14.78676478125),
+    "fl oz": (VOLUME, 29.5735295625),
+    "cup": (VOLUME, 236.5882365),
+    "pint": (VOLUME, 473.176473),
+    "quart": (VOLUME, 946.352946),
+    "gallon": (VOLUME, 3785.411784),
+    "each": (COUNT, 1.0),
+    "dozen": (COUNT, 12.0),
+}
+
+ALIASES = {
+    "gram": "g", "grams": "g", "gr": "g", "gm": "g",
+    "kilogram": "kg", "kilograms": "kg", "kilo": "kg", "kilos": "kg", "kgs": "kg",
+    "milligram": "mg", "milligrams": "mg",
+    "ounce": "oz", "ounces": "oz",
+    "pound": "lb", "pounds": "lb", "lbs": "lb",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml", "mls": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l", "ltr": "l",
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsps": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsps": "tbsp", "tbs": "tbsp",
+    "fluid ounce": "fl oz", "fluid ounces": "fl oz", "floz": "fl oz",
+    "cups": "cup", "c": "cup",
+    "pints": "pint", "pt": "pint",
+    "quarts": "quart", "qt": "quart",
+    "gallons": "gallon", "gal": "gallon",
+    "": "each", "ea": "each", "x": "each", "pc": "each", "pcs": "each", "piece": "each",
+    "pieces": "each", "count": "each", "ct": "each", "unit": "each", "units": "each",
+    "dozens": "dozen", "doz": "dozen",
+}
+
+# Every same-dimension pair: CONVERSIONS[(from, to)] = multiplier
+CONVERSIONS = {
+    (a, b): fa / fb
+    for a, (da, fa) in CANONICAL.items()
+    for b, (db, fb) in CANONICAL.items()
+    if da == db
+}
+
+
+class Unit(NamedTuple):
+    name: str  # canonical spelling ("lb"), or the cleaned text for unknown units
+    dimension: str  # mass / volume / count, or "unit:<name>" for unknown units
+    factor: float  # multiply by this to get base units
+
+    @property
+    def base(self) -> str:
+        return BASE_UNITS.get(self.dimension, self.name)
+
+
+@lru_cache(maxsize=4096)
+def parse_unit(text: Optional[str]) -> Unit:
+    cleaned = re.sub(r"\s+", " ", (text or "").strip().lower().replace(".", ""))
+    name = ALIASES.get(cleaned, cleaned)
+    if name not in CANONICAL and name.endswith("s") and name[:-1] in CANONICAL:
+        name = name[:-1]
+    if name in CANONICAL:
+        dimension, factor = CANONICAL[name]
+        return Unit(name, dimension, factor)
+    # Unknown units only match themselves; drop a plural "s" so "cans" == "can"
+    if len(name) > 3 and name.endswith("s") and not name.endswith("ss"):
+        name = name[:-1]
+    return Unit(name, f"unit:{name}", 1.0)
+
+
+def to_base(quantity: Optional[float], unit: Optional[str]) -> Tuple[float, str]:
+    """(quantity in base units, base unit name)."""
+    u = parse_unit(unit)
+    return (quantity or 0.0) * u.factor, u.base
+
+
+def to_base_many(quantities: Iterable[Optional[float]], units: Iterable[Optional[str]]) -> List[Tuple[float, str]]:
+    """to_base over parallel sequences, resolving each distinct unit once."""
+    units = list(units)
+    resolved = {u: parse_unit(u) for u in set(units)}
+    return [((q or 0.0) * resolved[u].factor, resolved[u].base) for q, u in zip(quantities, units)]
+
+
+def compatible(a: Optional[str], b: Optional[str]) -> bool:
+    return parse_unit(a).dimension == parse_unit(b).dimension
+
+
+def convert(quantity: float, from_unit: Optional[str], to_unit: Optional[str]) -> float:
+    """Convert between units of one dimension. Raises ValueError otherwise."""
+    a, b = parse_unit(from_unit), parse_unit(to_unit)
+    if a.dimension != b.dimension:
+        raise ValueError(f"Cannot convert {from_unit or 'each'} to {to_unit or 'each'}")
+    factor = CONVERSIONS.get((a.name, b.name))
+    return quantity * (factor if factor is not None else a.factor / b.factor)
@@ -1,4 +1,56 @@
+"""
+Launch the Kitchenventory server.
+
+    python run.py           # development: one process, auto-reload
+    python run.py --prod    # production: worker processes, no file watcher
+
+In --prod mode the database is created, migrated and seeded once here,
+before any worker starts. Send SIGHUP to this process to restart the
+workers one at a time. SIGTTIN/SIGTTOU add or remove a worker. Scheduled
+tasks (digest, backups, compaction) run in whichever worker holds the
+scheduler lock (app/scheduler.py), never in all of them.
+"""
+import argparse
+import importlib.util
+import os
+
 import uvicorn
 
+from app.config import settings
+
+
+def _prod(workers: int) -> None:
+    from app.startup import prepare_database
+
+    prepare_database()
+    # Workers re-read Settings from the environment; skip their own DB setup
+    os.environ["INIT_DB_ON_STARTUP"] = "false"
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+        timeout_keep_alive=settings.server_keepalive_seconds,
+        backlog=settings.server_backlog,
+        timeout_graceful_shutdown=settings.server_graceful_timeout_seconds,
+        limit_max_requests=settings.server_max_requests or None,
+        limit_max_requests_jitter=max(settings.server_max_requests // 10, 0),
+        proxy_headers=True,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the Kitchenventory server")
+    parser.add_argument("--prod", action="store_true", help="production mode: multiple workers, no reload")
+    parser.add_argument("--workers", type=int, default=settings.server_workers, help="worker processes in --prod mode")
+    args = parser.parse_args()
+
+    if args.prod:
+        _prod(args.workers)
+    else:
+        # Serve static/ directly so edits show up without rebuilding assets
+        os.environ["USE_STATIC_BUILD"] = "false"
+        uvicorn.run("app.main:app", host=settings.server_host, port=settings.server_port, reload=True)
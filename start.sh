@@ -1,23 +1,46 @@
 #!/bin/bash
-# Start kitchenventory server in the background
+# Start kitchenventory server in the background (production mode)
+#
+#   ./start.sh          start, or stop and restart if already running
+#   ./start.sh reload   gracefully restart workers without dropping the socket
+#
+# Worker count, keep-alive etc. come from SERVER_* settings in .env
 
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 PIDFILE="$SCRIPT_DIR/server.pid"
 LOGFILE="$SCRIPT_DIR/server.log"
 
+if [ "$1" = "reload" ]; then
+  if [ -f "$PIDFILE" ] && kill -0 "$(cat "$PIDFILE")" 2>/dev/null; then
+    kill -HUP "$(cat "$PIDFILE")"
+    echo "Restarting workers (PID $(cat "$PIDFILE"))..."
+    exit 0
+  fi
+  echo "Server is not running."
+  exit 1
+fi
+
 # Kill any existing instance
 if [ -f "$PIDFILE" ]; then
   OLD_PID=$(cat "$PIDFILE")
   if kill -0 "$OLD_PID" 2>/dev/null; then
     echo "Stopping existing server (PID $OLD_PID)..."
     kill "$OLD_PID"
-    sleep 1
+    # Wait for in-flight requests to drain (graceful shutdown)
+    for _ in $(seq 1 30); do
+      kill -0 "$OLD_PID" 2>/dev/null || break
+      sleep 1
+    done
   fi
   rm -f "$PIDFILE"
 fi
 
+# Fingerprint + precompress static assets
+cd "$SCRIPT_DIR" || exit 1
+"$SCRIPT_DIR/.venv/bin/python" -m app.build_static >> "$LOGFILE" 2>&1
+
 # Start server in background
 echo "Starting kitchenventory on http://localhost:8000..."
-nohup "$SCRIPT_DIR/.venv/bin/python" "$SCRIPT_DIR/run.py" >> "$LOGFILE" 2>&1 &
+nohup "$SCRIPT_DIR/.venv/bin/python" "$SCRIPT_DIR/run.py" --prod >> "$LOGFILE" 2>&1 &
 echo $! > "$PIDFILE"
 echo "Server started (PID $(cat $PIDFILE)). Logs: $LOGFILE"
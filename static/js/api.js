@@ -4,15 +4,26 @@
 const API = (() => {
   const BASE = '/api';
 
+  function newKey() {
+    if (crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+
   async function request(method, path, body) {
     const opts = {
       method,
       headers: body ? { 'Content-Type': 'application/json' } : {},
     };
     if (body !== undefined) opts.body = JSON.stringify(body);
+    // Lets the server recognise a retried mutation (e.g. the service worker's offline replay)
+    if (method !== 'GET') opts.headers['Idempotency-Key'] = newKey();
 
     const res = await fetch(`${BASE}${path}`, opts);
 
+    if (res.headers.get('X-Offline-Queued')) {
+      Toast.show("You're offline — change saved and will sync", 'warning');
+    }
+
     if (res.status === 204) return null;
 
     const data = await res.json();
@@ -23,6 +34,22 @@ const API = (() => {
     return data;
   }
 
+  /**
+   * Run a slow server-side task as a background job and poll until it finishes.
+   * Each poll is a short request, so a locked phone screen doesn't kill the work.
+   */
+  async function runJob(kind, payload) {
+    let job = await request('POST', '/jobs', { kind, payload });
+    let delay = 500;
+    while (job.status !== 'done' && job.status !== 'failed') {
+      await new Promise(r => setTimeout(r, delay));
+      delay = Math.min(delay * 1.5, 3000);
+      job = await request('GET', `/jobs/${job.id}`);
+    }
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+    return job.result;
+  }
+
   // Items
   const items = {
     list: (params = {}) => {
@@ -33,13 +60,35 @@ const API = (() => {
     },
     get: (id) => request('GET', `/items/${id}`),
     create: (data) => request('POST', '/items', data),
+    grouped: (params = {}) => {
+      const qs = new URLSearchParams(
+        Object.fromEntries(Object.entries(params).filter(([, v]) => v !== null && v !== undefined && v !== ''))
+      ).toString();
+      return request('GET', `/items/grouped${qs ? '?' + qs : ''}`);
+    },
     bulkCreate: (dataArray) => request('POST', '/items/bulk', { items: dataArray }),
-    parseList: (text) => request('POST', '/items/parse-list', { text }),
+    parseList: (text) => runJob('parse_list', { text }),
     update: (id, data) => request('PUT', `/items/${id}`, data),
     delete: (id) => request('DELETE', `/items/${id}`),
     adjustQty: (id, delta) => request('PATCH', `/items/${id}/quantity`, { delta }),
+    exportUrl: (format = 'csv') => `${BASE}/items/export?format=${format}`,
+    importFile: async (file) => {
+      const format = /\.(nd)?jsonl?$/i.test(file.name) ? 'ndjson' : 'csv';
+      const res = await fetch(`${BASE}/items/import?format=${format}`, {
+        method: 'POST',
+        headers: { 'Idempotency-Key': newKey() },
+        body: file,
+      });
+      const data = await res.json();
+      if (!res.ok) throw new Error(typeof data?.detail === 'string' ? data.detail : `HTTP ${res.status}`);
+      return data;
+    },
   };
 
+  // Autocomplete
+  const autocomplete = (q, limit = 8) =>
+    request('GET', `/autocomplete?q=${encodeURIComponent(q)}&limit=${limit}`);
+
   // Categories
   const categories = {
     list: () => request('GET', '/categories'),
@@ -60,14 +109,18 @@ const API = (() => {
     update: (id, data) => request('PUT', `/shopping/${id}`, data),
     delete: (id) => request('DELETE', `/shopping/${id}`),
     autoSuggest: () => request('POST', '/shopping/auto-suggest'),
+    fromMealPlan: (start = null, end = null) => {
+      const qs = new URLSearchParams(Object.fromEntries(Object.entries({ start, end }).filter(([, v]) => v))).toString();
+      return request('POST', `/shopping/from-mealplan${qs ? '?' + qs : ''}`);
+    },
     export: () => request('GET', '/shopping/export'),
     clearChecked: () => request('DELETE', '/shopping/checked'),
   };
 
   // Recipes
   const recipes = {
-    suggest: (dietary_notes = '') => request('POST', '/recipes/suggest', { dietary_notes }),
-    parseUrl: (url) => request('POST', '/recipes/parse-url', { url }),
+    suggest: (dietary_notes = '') => runJob('recipe_suggest', { dietary_notes }),
+    parseUrl: (url) => runJob('parse_url', { url }),
     parseHtml: (html, url = '') => request('POST', '/recipes/parse-html', { html, url }),
     listTags: () => request('GET', '/recipes/tags'),
     listSaved: (params = {}) => {
@@ -89,9 +142,16 @@ const API = (() => {
       const qs = week ? `?week=${week}` : '';
       return request('GET', `/mealplan${qs}`);
     },
+    range: (start, end) => request('GET', `/mealplan/range?start=${start}&end=${end}`),
+    bulkUpsert: (entries, overwrite = true) => request('PUT', `/mealplan/bulk?overwrite=${overwrite}`, { entries }),
     create: (data) => request('POST', '/mealplan', data),
     update: (id, data) => request('PUT', `/mealplan/${id}`, data),
     delete: (id) => request('DELETE', `/mealplan/${id}`),
+    listTemplates: () => request('GET', '/mealplan/templates'),
+    saveTemplate: (name, fromWeek) => request('POST', '/mealplan/templates', { name, from_week: fromWeek }),
+    applyTemplate: (id, week, overwrite = true) =>
+      request('POST', `/mealplan/templates/${id}/apply?week=${week}&overwrite=${overwrite}`),
+    deleteTemplate: (id) => request('DELETE', `/mealplan/templates/${id}`),
   };
 
   // App Settings
@@ -100,5 +160,15 @@ const API = (() => {
     update: (key, value) => request('PATCH', `/settings/${key}`, { value }),
   };
 
-  return { items, categories, locations, shopping, recipes, mealplan, settings };
+  return { items, autocomplete, categories, locations, shopping, recipes, mealplan, settings };
 })();
+
+// Ask the service worker to flush its offline outbox whenever we regain signal
+if ('serviceWorker' in navigator) {
+  const replayOutbox = () => navigator.serviceWorker.controller?.postMessage({ type: 'replay-outbox' });
+  window.addEventListener('online', replayOutbox);
+  navigator.serviceWorker.ready.then(replayOutbox);
+  navigator.serviceWorker.addEventListener('message', e => {
+    if (e.data?.type === 'outbox-replayed') Toast.show('Offline changes synced', 'success');
+  });
+}
@@ -188,6 +188,17 @@ const ItemFormView = (() => {
 
   // --- Autocomplete logic ---
 
+  // Server-side index covers shopping history and recipe ingredients too;
+  // fall back to the loaded items when offline
+  async function fetchAutocompleteSuggestions(query) {
+    if (!query.trim()) return [];
+    try {
+      return await API.autocomplete(query.trim());
+    } catch {
+      return getAutocompleteSuggestions(query);
+    }
+  }
+
   function getAutocompleteSuggestions(query) {
     const items = App.state.items || [];
     const q = query.toLowerCase().trim();
@@ -268,9 +279,11 @@ const ItemFormView = (() => {
 
     nameInput.addEventListener('input', () => {
       clearTimeout(_autocompleteTimer);
-      _autocompleteTimer = setTimeout(() => {
-        const suggestions = getAutocompleteSuggestions(nameInput.value);
-        renderDropdown(suggestions, nameInput.value);
+      _autocompleteTimer = setTimeout(async () => {
+        const query = nameInput.value;
+        const suggestions = await fetchAutocompleteSuggestions(query);
+        if (nameInput.value !== query) return; // a newer keystroke is in flight
+        renderDropdown(suggestions, query);
       }, 150);
     });
 
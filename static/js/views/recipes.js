@@ -58,7 +58,7 @@ const RecipesView = (() => {
 
     return `
       <div class="recipe-card" data-id="${recipe.id}">
-        ${recipe.image_url ? `<img class="recipe-card-img" src="${escapeHtml(recipe.image_url)}" alt="" onerror="this.style.display='none'">` : ''}
+        ${recipe.thumbnail_url ? `<img class="recipe-card-img" src="${escapeHtml(recipe.thumbnail_url)}&w=480" srcset="${escapeHtml(recipe.thumbnail_url)}&w=960 2x" loading="lazy" alt="" onerror="this.style.display='none'">` : ''}
         <div class="recipe-card-header" data-action="toggle" data-id="${recipe.id}">
           <div class="recipe-card-title-block">
             <div class="recipe-name">${escapeHtml(recipe.title)}</div>
@@ -232,6 +232,22 @@ const SettingsView = (() => {
           </form>
         </div>
 
+        <div class="settings-section">
+          <div class="section-title">Inventory Data</div>
+          <div class="settings-card">
+            <div class="settings-card-label">Export or import items as CSV</div>
+            <div class="settings-card-actions">
+              <a class="settings-btn-secondary" href="${API.items.exportUrl('csv')}" download>
+                <i class="fa-solid fa-download"></i> Export CSV
+              </a>
+              <label class="settings-btn-secondary">
+                <i class="fa-solid fa-upload"></i> Import CSV
+                <input type="file" id="import-items-file" accept=".csv,.ndjson,.jsonl,text/csv" hidden />
+              </label>
+            </div>
+          </div>
+        </div>
+
         <div class="settings-section">
           <div class="section-title">Appearance</div>
           <div class="settings-row">
@@ -378,6 +394,21 @@ const SettingsView = (() => {
       }
     });
 
+    // Inventory import
+    container.querySelector('#import-items-file').addEventListener('change', async (e) => {
+      const file = e.target.files[0];
+      e.target.value = '';
+      if (!file) return;
+      try {
+        const result = await API.items.importFile(file);
+        const skipped = result.failed ? `, ${result.failed} skipped` : '';
+        Toast.show(`Imported ${result.imported} items${skipped}`, result.failed ? 'warning' : 'success');
+        if (result.errors.length) console.warn('Import errors', result.errors);
+      } catch (err) {
+        Toast.show(err.message, 'error');
+      }
+    });
+
     // Theme toggle
     container.querySelectorAll('[data-theme]').forEach(btn => {
       btn.addEventListener('click', () => {
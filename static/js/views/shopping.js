@@ -14,7 +14,7 @@ const ShoppingView = (() => {
           <div class="shopping-item-name">${escapeHtml(item.name)}</div>
           <div class="shopping-item-qty">${item.quantity} ${escapeHtml(item.unit || '')}</div>
         </div>
-        ${item.source === 'auto' ? '<span class="shopping-item-source">auto</span>' : ''}
+        ${item.source === 'auto' || item.source === 'mealplan' ? `<span class="shopping-item-source">${item.source === 'auto' ? 'auto' : 'meal plan'}</span>` : ''}
         <button class="shopping-item-delete btn" data-action="delete" data-id="${item.id}" title="Remove">✕</button>
       </div>
     `;
@@ -53,6 +53,7 @@ const ShoppingView = (() => {
       <div class="shopping-view">
         <div class="shopping-header">
           <button class="btn btn-primary btn-sm" id="auto-suggest-btn">✨ Auto-Suggest</button>
+          <button class="btn btn-secondary btn-sm" id="from-mealplan-btn">📅 From Meal Plan</button>
           <button class="btn btn-secondary btn-sm" id="export-btn">📋 Copy List</button>
           <button class="btn btn-secondary btn-sm" id="clear-checked-btn">🗑 Clear Checked</button>
         </div>
@@ -101,6 +102,30 @@ const ShoppingView = (() => {
       }
     });
 
+    // This week's planned meals -> missing ingredients
+    container.querySelector('#from-mealplan-btn').addEventListener('click', async () => {
+      const btn = container.querySelector('#from-mealplan-btn');
+      btn.disabled = true;
+      try {
+        const result = await API.shopping.fromMealPlan();
+        _items = await API.shopping.list();
+        renderList(container);
+        // Stocked in units that don't convert (5 lb flour vs cups): the user has to judge these
+        const check = result.unknown.length ? ` (check your ${result.unknown.join(', ')})` : '';
+        if (result.recipes === 0) {
+          Toast.show('No saved recipes in this week\'s meal plan', 'info');
+        } else if (result.added.length === 0) {
+          Toast.show(`Everything for this week's meals is in stock or listed${check}`, 'info');
+        } else {
+          Toast.show(`Added ${result.added.length} ingredient${result.added.length > 1 ? 's' : ''} for ${result.recipes} recipe${result.recipes > 1 ? 's' : ''}${check}`, 'success');
+        }
+      } catch (err) {
+        Toast.show('Error: ' + err.message, 'error');
+      } finally {
+        btn.disabled = false;
+      }
+    });
+
     // Export
     container.querySelector('#export-btn').addEventListener('click', async () => {
       try {
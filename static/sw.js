@@ -17,6 +17,192 @@ const PRECACHE = [
   '/icons/icon.svg',
 ];
 
+// ---- Offline API support ----
+//
+// GET /api/items, /api/shopping and /api/mealplan are served
+// stale-while-revalidate from API_CACHE. Mutations on those resources that
+// fail for lack of network are applied to the cached lists, saved in an
+// IndexedDB outbox, and replayed in order once the network is back. Every
+// mutation carries an Idempotency-Key (set in api.js), so a replay of a
+// request that did reach the server is harmless.
+
+const API_CACHE = 'kitchenventory-api';
+const OFFLINE_RESOURCES = ['items', 'shopping', 'mealplan'];
+
+function resourceOf(url) {
+  const m = url.pathname.match(/^\/api\/([a-z]+)/);
+  return m ? m[1] : null;
+}
+
+async function staleWhileRevalidate(request) {
+  const cache = await caches.open(API_CACHE);
+  const cached = await cache.match(request);
+  const network = fetch(request)
+    .then(res => {
+      if (res.ok) cache.put(request, res.clone());
+      replayOutbox();
+      return res;
+    })
+    .catch(() => null);
+  if (cached) return cached;
+  const res = await network;
+  return res || jsonResponse({ detail: "You're offline and this list isn't cached yet." }, 503);
+}
+
+async function invalidate(resource) {
+  const cache = await caches.open(API_CACHE);
+  const keys = await cache.keys();
+  await Promise.all(keys.filter(r => resourceOf(new URL(r.url)) === resource).map(r => cache.delete(r)));
+}
+
+async function mutate(request) {
+  const body = request.method === 'DELETE' ? null : await request.clone().text();
+  // Earlier offline changes go first, so the server sees mutations in order
+  await replayOutbox().catch(() => {});
+  try {
+    const res = await fetch(request);
+    // Before returning, so the view's next read can't be served the stale cached list
+    if (res.ok) await invalidate(resourceOf(new URL(request.url))).catch(() => {});
+    return res;
+  } catch (err) {
+    return queueOffline(request, body);
+  }
+}
+
+// Which offline mutations we can apply locally: /api/<res>, /api/<res>/<id>, /api/items/<id>/quantity
+const OFFLINE_PATH = /^\/api\/(items|shopping|mealplan)(?:\/(-?\d+)(\/quantity)?)?$/;
+
+async function queueOffline(request, body) {
+  const url = new URL(request.url);
+  const m = url.pathname.match(OFFLINE_PATH);
+  if (!m) return jsonResponse({ detail: "You're offline. Try again when you have signal." }, 503);
+
+  const [, resource, idStr, quantity] = m;
+  const data = body ? JSON.parse(body) : null;
+  const entry = {
+    url: url.pathname + url.search,
+    method: request.method,
+    body,
+    key: request.headers.get('Idempotency-Key'),
+    resource,
+  };
+
+  let result = null;
+  let status = 204;
+  if (request.method === 'POST' && !idStr) {
+    entry.tempId = -Date.now();
+    result = { ...data, id: entry.tempId, created_at: new Date().toISOString() };
+    await patchCachedLists(resource, list => [...list, result]);
+    status = 201;
+  } else if (request.method === 'DELETE' && idStr) {
+    await patchCachedLists(resource, list => list.filter(r => r.id !== Number(idStr)));
+  } else if (idStr) {
+    await patchCachedLists(resource, list => list.map(r => {
+      if (r.id !== Number(idStr)) return r;
+      result = quantity
+        ? { ...r, quantity: Math.max(0, r.quantity + data.delta) }
+        : { ...r, ...data };
+      if ('low_threshold' in result) result.is_low = result.quantity <= result.low_threshold;
+      return result;
+    }));
+    if (!result) return jsonResponse({ detail: "You're offline and that item isn't cached." }, 503);
+    status = 200;
+  } else {
+    return jsonResponse({ detail: "You're offline. Try again when you have signal." }, 503);
+  }
+
+  await outbox('readwrite', store => store.add(entry));
+  if (self.registration.sync) self.registration.sync.register('outbox').catch(() => {});
+  return result
+    ? jsonResponse(result, status, { 'X-Offline-Queued': '1' })
+    : new Response(null, { status, headers: { 'X-Offline-Queued': '1' } });
+}
+
+async function patchCachedLists(resource, fn) {
+  const cache = await caches.open(API_CACHE);
+  const keys = await cache.keys();
+  for (const req of keys) {
+    if (resourceOf(new URL(req.url)) !== resource) continue;
+    const res = await cache.match(req);
+    const list = await res.json();
+    await cache.put(req, jsonResponse(fn(list), 200));
+  }
+}
+
+let _replaying = null;
+
+function replayOutbox() {
+  if (!_replaying) {
+    _replaying = doReplay().finally(() => { _replaying = null; });
+  }
+  return _replaying;
+}
+
+async function doReplay() {
+  const entries = await outbox('readonly', store => store.getAll());
+  const idMap = {};  // temp id from an offline create -> real id from the server
+  const touched = new Set();
+  for (const entry of entries) {
+    let url = entry.url;
+    for (const [tmp, real] of Object.entries(idMap)) url = url.replace(`/${tmp}`, `/${real}`);
+    let res;
+    try {
+      res = await fetch(url, {
+        method: entry.method,
+        headers: { 'Content-Type': 'application/json', ...(entry.key ? { 'Idempotency-Key': entry.key } : {}) },
+        body: entry.body,
+      });
+    } catch (err) {
+      break;  // still offline: keep this and everything after it, in order
+    }
+    // 5xx, or 409 + Retry-After (the same key is still running elsewhere): try again later
+    if (res.status >= 500 || (res.status === 409 && res.headers.has('Retry-After'))) break;
+    if (res.ok && entry.tempId) {
+      const created = await res.json().catch(() => null);
+      if (created && created.id) idMap[entry.tempId] = created.id;
+    }
+    // 2xx is done; 4xx will never succeed (e.g. item deleted elsewhere) — drop it either way
+    await outbox('readwrite', store => store.delete(entry.seq));
+    touched.add(entry.resource);
+  }
+  await Promise.all([...touched].map(invalidate));
+  if (touched.size) {
+    const clients = await self.clients.matchAll();
+    clients.forEach(c => c.postMessage({ type: 'outbox-replayed', resources: [...touched] }));
+  }
+}
+
+function outbox(mode, fn) {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open('kitchenventory', 1);
+    open.onupgradeneeded = () => open.result.createObjectStore('outbox', { keyPath: 'seq', autoIncrement: true });
+    open.onerror = () => reject(open.error);
+    open.onsuccess = () => {
+      const db = open.result;
+      const tx = db.transaction('outbox', mode);
+      const req = fn(tx.objectStore('outbox'));
+      tx.oncomplete = () => { db.close(); resolve(req.result); };
+      tx.onerror = () => { db.close(); reject(tx.error); };
+    };
+  });
+}
+
+function jsonResponse(data, status, headers = {}) {
+  return new Response(JSON.stringify(data), {
+    status,
+    headers: { 'Content-Type': 'application/json', ...headers },
+  });
+}
+
+self.addEventListener('sync', e => {
+  if (e.tag === 'outbox') e.waitUntil(replayOutbox());
+});
+
+self.addEventListener('message', e => {
+  if (e.data && e.data.type === 'replay-outbox') e.waitUntil(replayOutbox());
+});
+
+
 self.addEventListener('install', e => {
   e.waitUntil(
     caches.open(CACHE).then(c => c.addAll(PRECACHE))
@@ -27,16 +213,48 @@ self.addEventListener('install', e => {
 self.addEventListener('activate', e => {
   e.waitUntil(
     caches.keys().then(keys =>
-      Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k)))
+      Promise.all(keys.filter(k => k !== CACHE && k !== API_CACHE).map(k => caches.delete(k)))
     )
   );
   self.clients.claim();
 });
 
 self.addEventListener('fetch', e => {
-  // Always go network-first for API calls
+  // Recipe thumbnails are content-addressed (?v=) and never change: cache-first
+  if (/\/api\/recipes\/saved\/\d+\/image/.test(e.request.url)) {
+    e.respondWith(
+      caches.match(e.request).then(hit => hit || fetch(e.request).then(res => {
+        if (res.ok) {
+          const clone = res.clone();
+          caches.open(CACHE).then(c => c.put(e.request, clone));
+        }
+        return res;
+      }))
+    );
+    return;
+  }
+
+  const url = new URL(e.request.url);
+  if (url.origin === location.origin && OFFLINE_RESOURCES.includes(resourceOf(url))) {
+    if (e.request.method === 'GET' && url.pathname === `/api/${resourceOf(url)}`) {
+      e.respondWith(staleWhileRevalidate(e.request));
+      return;
+    }
+    if (e.request.method !== 'GET') {
+      e.respondWith(mutate(e.request));
+      return;
+    }
+  }
+
+  // Everything else under /api/ goes straight to the network
   if (e.request.url.includes('/api/')) return;
 
+  // Fingerprinted build assets (style.3f2a9c1b0e.css) never change: cache-first
+  if (/\.[0-9a-f]{10}\.\w+$/.test(new URL(e.request.url).pathname)) {
+    e.respondWith(caches.match(e.request).then(hit => hit || fetch(e.request)));
+    return;
+  }
+
   // For everything else: network first, fall back to cache
   e.respondWith(
     fetch(e.request)